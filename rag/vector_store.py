@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import os
-from typing import Dict, List, Tuple
+import time
+from typing import Dict, List, Optional, Tuple
 
 import uuid
 
+# How long a cached collection count stays valid before re-asking Chroma
+_COUNT_TTL_S = float(os.getenv("VECTOR_COUNT_TTL_S", "30"))
+
 
 class ChromaVectorStore:
     """
@@ -20,6 +24,8 @@ class ChromaVectorStore:
             raise RuntimeError("chromadb is not installed. Please install chromadb.") from e
         os.makedirs(persist_dir, exist_ok=True)
         self._chroma = chromadb.PersistentClient(path=persist_dir)
+        # course_id -> (count, monotonic timestamp)
+        self._counts: Dict[int, Tuple[int, float]] = {}
 
     def _get_collection(self, course_id: int):
         name = f"course_{course_id}"
@@ -44,11 +50,73 @@ class ChromaVectorStore:
             for c in chunks
         ]
         col.add(ids=ids, embeddings=vectors, metadatas=metadatas, documents=documents)
+        self._counts.pop(course_id, None)
+
+    def _count(self, course_id: int, col) -> int:
+        cached = self._counts.get(course_id)
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < _COUNT_TTL_S:
+            return cached[0]
+        n = col.count()
+        # An empty count is never cached: chunks added through another store
+        # instance would stay invisible for the whole TTL
+        if n:
+            self._counts[course_id] = (n, now)
+        return n
+
+    @staticmethod
+    def _to_chunk(doc, meta) -> Dict:
+        meta = meta or {}
+        return {
+            "course_id": meta.get("course_id"),
+            "title": meta.get("title", ""),
+            "url": meta.get("url", ""),
+            "content_with_weight": doc or "",
+        }
+
+    def _rank_locally(
+        self, col, query_vector: List[float], top_k: int
+    ) -> Optional[List[Tuple[Dict, float]]]:
+        """
+        Brute-force ranking for small collections: one col.get() instead of an HNSW query.
+        Distances follow the collection's space so results stay comparable with col.query().
+        Returns None if the collection has grown past top_k since it was counted
+        (the count may be cached), so the caller queries the index instead.
+        """
+        import numpy as np
+
+        res = col.get(include=["embeddings", "documents", "metadatas"])
+        if len(res.get("ids") or []) > top_k:
+            return None
+        embeddings = res.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            return []
+        vecs = np.asarray(embeddings, dtype=np.float32)
+        qv = np.asarray(query_vector, dtype=np.float32)
+        space = (col.metadata or {}).get("hnsw:space", "l2")
+        if space == "cosine":
+            norms = np.linalg.norm(vecs, axis=1) * (np.linalg.norm(qv) or 1.0)
+            dists = 1.0 - (vecs @ qv) / np.where(norms == 0, 1.0, norms)
+        elif space == "ip":
+            dists = 1.0 - vecs @ qv
+        else:
+            # Chroma reports squared L2
+            diff = vecs - qv
+            dists = np.einsum("ij,ij->i", diff, diff)
+        order = np.argsort(dists)[:top_k]
+        docs = res.get("documents") or []
+        metas = res.get("metadatas") or []
+        return [(self._to_chunk(docs[i], metas[i]), float(dists[i])) for i in order]
 
     def search(self, course_id: int, query_vector: List[float], top_k: int = 5) -> List[Tuple[Dict, float]]:
         col = self._get_collection(course_id)
-        if col.count() == 0:
+        n = self._count(course_id, col)
+        if n == 0:
             return []
+        if n <= top_k:
+            ranked = self._rank_locally(col, query_vector, top_k)
+            if ranked is not None:
+                return ranked
         res = col.query(
             query_embeddings=[query_vector],
             n_results=top_k,
@@ -60,11 +128,5 @@ class ChromaVectorStore:
         dists = (res.get("distances") or [[]])[0]
         results: List[Tuple[Dict, float]] = []
         for doc, meta, dist in zip(docs, metas, dists):
-            chunk = {
-                "course_id": meta.get("course_id"),
-                "title": meta.get("title", ""),
-                "url": meta.get("url", ""),
-                "content_with_weight": doc or "",
-            }
-            results.append((chunk, float(dist)))
+            results.append((self._to_chunk(doc, meta), float(dist)))
         return results
\ No newline at end of file
@@ -7,9 +7,16 @@ Downloads course materials from HKU Moodle and Exambase
 """
 
 from .scraper import RAGScraper, scrape
-from .moodle import HKUMoodleScraper
+from .moodle import HKUMoodleScraper, shutdown_driver_pool
 from .exambase import ExambaseScraper
 from .logger import RAGLogger
 
 __version__ = "1.0.0"
-__all__ = ["RAGScraper", "scrape", "HKUMoodleScraper", "ExambaseScraper", "RAGLogger"]
\ No newline at end of file
+__all__ = [
+    "RAGScraper",
+    "scrape",
+    "HKUMoodleScraper",
+    "shutdown_driver_pool",
+    "ExambaseScraper",
+    "RAGLogger",
+]
\ No newline at end of file
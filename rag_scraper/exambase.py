@@ -6,9 +6,16 @@ Downloads exam papers from HKU Exambase system for all courses in knowledge_base
 """
 
 import os
+import json
 import time
 import re
+import shutil
 import argparse
+import threading
+from collections import defaultdict
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -16,10 +23,326 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, WebDriverException
 import requests
-
-from .logger import get_logger
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:  # optional, BeautifulSoup is used instead
+    HTMLParser = None
+
+try:
+    from playwright.sync_api import sync_playwright, Error as PlaywrightError
+except ImportError:  # optional, only needed for --engine playwright
+    sync_playwright = None
+    PlaywrightError = Exception
+
+from .logger import get_logger, correlation_id
+from .utils import LOGIN_LOCK, sanitize_filename, write_private_json
 
 CONNECT_TIME_OUT = 5  # seconds
+PAGE_LOAD_TIME_OUT = 3  # seconds, for Exambase pages once logged in (eager loads are fast)
+POLL_FREQUENCY = 0.1  # seconds between WebDriverWait condition checks
+
+# Exam results are listed in alternating <td> rows
+RESULT_SELECTOR = "td.evenResultDetail, td.oddResultDetail"
+
+# Sub-resources the scraper never needs; blocked via Chrome DevTools Protocol
+BLOCKED_URL_PATTERNS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.svg",
+    "*.ico",
+    "*.css",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*googletagmanager*",
+    "*google-analytics*",
+]
+
+# Adaptive pacing between course searches: the gap doubles when the server
+# throttles or drops connections and decays back towards the floor on success
+MIN_SEARCH_GAP = 0.2  # seconds
+MAX_SEARCH_GAP = 5.0  # seconds
+
+DOWNLOAD_WORKERS = 8  # concurrent PDF downloads per course
+DOWNLOAD_CHUNK_SIZE = 1 << 16  # 64 KiB copy buffer
+
+# Authenticated cookies are cached here so later runs can skip the SSO form
+COOKIE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "kengu")
+COOKIE_MAX_AGE = 12 * 60 * 60  # seconds
+# Fields kept per cached cookie (what driver.add_cookie / add_cookies need)
+CACHED_COOKIE_KEYS = ("name", "value", "domain", "path", "expiry", "secure", "httpOnly")
+
+# Persistent Chrome profiles keep the proxy SSO state between runs. Each running
+# browser needs its own profile, so concurrent scrapers take numbered slots.
+# Delete the kengu_chrome_* directories to force a fresh SSO login.
+MAX_PROFILE_SLOTS = 8
+
+# Course code prefix of a course/folder name (e.g., COMP7103 from "COMP7103 Data mining")
+_RE_COURSE = re.compile(r"^([A-Z]+\d+)")
+
+# Per-exam metadata and filename patterns used by download_exam_papers
+_RE_DATE = re.compile(r"Exam date.*?(\d{1,2}-\d{1,2}-\d{4})")
+_RE_REMARK = re.compile(r"Remark:\s*([^<\n]+)")
+_RE_SUBCLASS = re.compile(
+    r"subclass(?:es)?\s*:\s*(.*)|subclass(?:es)?\s+(.*)", re.IGNORECASE
+)
+_RE_UPPER = re.compile(r"[A-Z]")
+_RE_NONWORD = re.compile(r"[^\w\s-]")
+_RE_SPACE = re.compile(r"\s+")
+
+# str.translate table dropping the ASCII characters _RE_NONWORD would strip
+_SANITIZE_TABLE = str.maketrans(
+    "",
+    "",
+    "".join(
+        chr(c)
+        for c in range(128)
+        if not (chr(c).isalnum() or chr(c).isspace() or chr(c) in "-_")
+    ),
+)
+
+# Selects the course-code search mode, fills in the code and submits the form.
+# Returns the current <html> element (to wait for it to go stale) or null if the
+# page has no search form
+_JS_SUBMIT_SEARCH = """
+const radio = document.querySelector("input[value='crs']");
+const key = document.querySelector("input[name='the_key']");
+if (!radio || !key) {
+    return null;
+}
+key.form.reset();
+radio.click();
+key.value = arguments[0];
+if (typeof check_form === "function") {
+    check_form();
+} else {
+    key.form.submit();
+}
+return document.documentElement;
+"""
+
+# Captures the search form's action, method and default field values so the
+# search can be replayed over HTTP without the browser
+_JS_CAPTURE_FORM = """
+const key = document.querySelector("input[name='the_key']");
+if (!key || !key.form) {
+    return null;
+}
+const form = key.form;
+const data = {};
+for (const el of form.elements) {
+    if (!el.name || el.disabled) continue;
+    if (["button", "submit", "image"].includes(el.type)) continue;
+    if (["radio", "checkbox"].includes(el.type) && !el.checked) continue;
+    data[el.name] = el.value;
+}
+const radio = form.querySelector("input[value='crs']");
+if (radio && radio.name) {
+    data[radio.name] = "crs";
+}
+return {action: form.action, method: (form.method || "get").toLowerCase(), data: data};
+"""
+
+# Returns {no_hits, rows} where rows holds {title, url, full_text} for every result
+# cell that contains a link; the hit check runs in the page so the DOM is never
+# serialised back over the WebDriver wire
+_JS_EXTRACT_RESULTS = """
+const noHits = /Total number of hits is 0|no hits/i.test(document.body.innerText);
+const rows = noHits ? [] : Array.from(document.querySelectorAll(arguments[0]))
+    .map(td => {
+        const a = td.querySelector("a");
+        return a ? {title: a.innerText.trim(), url: a.href, full_text: td.innerText} : null;
+    })
+    .filter(Boolean);
+return {no_hits: noHits, rows: rows};
+"""
+
+
+def _as_page_function(script):
+    """
+    Wrap a WebDriver-style script (arguments[0], top-level return) so it can be
+    passed to Playwright's page.evaluate() with a single argument
+    """
+    return "(arg) => (function () {%s}).call(null, arg)" % script
+
+
+def _is_exam_pdf(href):
+    """Check whether a result link points at a downloadable exam paper"""
+    return bool(href) and ("/archive/files/" in href or ".pdf" in href.lower())
+
+
+def _parse_results_html(html, base_url):
+    """
+    Parse an Exambase results page
+
+    Args:
+        html: Page HTML
+        base_url: URL the page was served from (for resolving relative links)
+
+    Returns:
+        list: {title, url, full_text} dicts for every result cell with a link,
+              or None if the HTML does not look like a results page
+    """
+    if HTMLParser is not None:
+        return _parse_results_selectolax(html, base_url)
+
+    soup = BeautifulSoup(html, "html.parser")
+    result_tds = soup.select(RESULT_SELECTOR)
+    if not result_tds:
+        text = soup.get_text()
+        if "Total number of hits is 0" in text or "no hits" in text.lower():
+            return []
+        return None
+
+    rows = []
+    for td in result_tds:
+        link = td.find("a", href=True)
+        if link is None:
+            continue
+        # Keep line breaks so the "Exam date" / "Remark" regexes see the same
+        # lines as the browser's innerText
+        for br in td.find_all("br"):
+            br.replace_with("\n")
+        rows.append(
+            {
+                "title": link.get_text(strip=True),
+                "url": urljoin(base_url, link["href"]),
+                "full_text": td.get_text(),
+            }
+        )
+    return rows
+
+
+def _parse_results_selectolax(html, base_url):
+    """Fast path of _parse_results_html using selectolax's C parser"""
+    tree = HTMLParser(html)
+    result_tds = tree.css(RESULT_SELECTOR)
+    if not result_tds:
+        text = tree.body.text() if tree.body is not None else ""
+        if "Total number of hits is 0" in text or "no hits" in text.lower():
+            return []
+        return None
+
+    rows = []
+    for td in result_tds:
+        link = td.css_first("a[href]")
+        if link is None:
+            continue
+        # Same line-break handling as the BeautifulSoup path
+        for br in td.css("br"):
+            br.replace_with("\n")
+        rows.append(
+            {
+                "title": link.text(strip=True),
+                "url": urljoin(base_url, link.attributes.get("href") or ""),
+                "full_text": td.text(),
+            }
+        )
+    return rows
+
+
+def _title_to_filename(title):
+    """
+    Turn an exam title into a filename stem ("Data mining!" -> "Data_mining")
+
+    Same result as stripping _RE_NONWORD and collapsing _RE_SPACE runs to "_",
+    but ASCII titles (the common case) avoid both regex passes.
+    """
+    if not title.isascii():
+        return _RE_SPACE.sub("_", _RE_NONWORD.sub("", title))
+
+    stem = title.translate(_SANITIZE_TABLE)
+    filename = "_".join(stem.split())
+    # Keep the underscores the regex would produce for edge whitespace
+    if stem[:1].isspace():
+        filename = "_" + filename
+    if stem[-1:].isspace() and not stem.isspace():
+        filename += "_"
+    return filename
+
+
+def _try_lock(path):
+    """
+    Take a non-blocking exclusive lock on a file
+
+    Returns:
+        file: Open handle holding the lock (close it to release), or None if
+              another process already holds it
+    """
+    handle = open(path, "a")
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+class _SearchPacer:
+    """
+    Process-wide pacing of Exambase searches
+
+    Every scraper (pooled browsers, parallel workers) takes its search slots
+    from the one instance below, so the proxy sees the intended rate however
+    many browsers run, and throttling seen by one slows them all.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.min_gap = MIN_SEARCH_GAP
+        self._next_slot = 0.0  # time.monotonic() of the next free search slot
+
+    def wait(self):
+        """Reserve the next search slot and sleep until it starts"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_gap
+        if slot > now:
+            time.sleep(slot - now)
+
+    def adjust(self, throttled):
+        """Back off after throttling / connection errors, speed up again on success"""
+        with self._lock:
+            if throttled:
+                self.min_gap = min(self.min_gap * 2, MAX_SEARCH_GAP)
+                # Push already reserved slots back as well
+                self._next_slot = max(
+                    self._next_slot, time.monotonic() + self.min_gap
+                )
+            else:
+                self.min_gap = max(self.min_gap * 0.8, MIN_SEARCH_GAP)
+
+
+_SEARCH_PACER = _SearchPacer()
+
+
+def _build_session():
+    """Create a requests session with pooled keep-alive connections and retries"""
+    session = requests.Session()
+    retry = Retry(
+        total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class ExambaseScraper:
     def __init__(self, username, password, headless=False, verbose=False):
@@ -40,40 +363,72 @@ class ExambaseScraper:
         self.exambase_url = (
             "https://exambase-lib-hku-hk.eproxy.lib.hku.hk/exhibits/show/exam/home"
         )
+        self.cookie_file = os.path.join(
+            COOKIE_CACHE_DIR, f"exambase_cookies_{username}.json"
+        )
+
+        # Authenticated HTTP session for searches and PDF downloads (cookies copied after login)
+        self.session = _build_session()
+        self._search_form = None  # captured lazily; False if unavailable
+        self._profile_dir = None
+        self._profile_lock = None
+        self._pacer = _SEARCH_PACER  # shared by every scraper in the process
 
         # Initialize browser
         self._initialize_driver()
 
+    def _acquire_profile_dir(self):
+        """
+        Reserve a persistent Chrome profile directory for this scraper
+
+        Returns:
+            str: Profile directory, or None if every slot is in use
+        """
+        if self._profile_dir:
+            return self._profile_dir
+
+        try:
+            os.makedirs(COOKIE_CACHE_DIR, exist_ok=True)
+        except OSError:
+            return None
+
+        for slot in range(MAX_PROFILE_SLOTS):
+            suffix = f"_{slot}" if slot else ""
+            profile_dir = os.path.join(
+                COOKIE_CACHE_DIR, f"kengu_chrome_{self.username}{suffix}"
+            )
+            lock = _try_lock(profile_dir + ".lock")
+            if lock is not None:
+                os.makedirs(profile_dir, exist_ok=True)
+                self._profile_dir = profile_dir
+                self._profile_lock = lock
+                return profile_dir
+
+        self._log("All Chrome profile slots busy, using a temporary profile")
+        return None
+
     def _initialize_driver(self):
         """Initialize or reinitialize the Chrome WebDriver"""
         # Setup Chrome options
         chrome_options = Options()
         if self.headless:
-            chrome_options.add_argument("--headless")
+            chrome_options.add_argument("--headless=new")
+        profile_dir = self._acquire_profile_dir()
+        if profile_dir:
+            chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+        # Return from driver.get() at DOMContentLoaded; explicit waits cover the rest
+        chrome_options.page_load_strategy = "eager"
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-images")
         chrome_options.add_argument("--blink-settings=imagesEnabled=false")
-        chrome_options.add_argument("--disable-css")
-        chrome_options.add_experimental_option(
-            "prefs", {"profile.default_content_setting_values.stylesheets": 2}
-        )
-        chrome_options.add_argument("--fast")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-plugins")
-        chrome_options.add_argument("--disable-plugin-types=all")
-        chrome_options.add_argument("--disable-http2")
-        chrome_options.add_argument("--disable-prefetching")
-        chrome_options.add_argument("--disable-preconnect")
-        chrome_options.add_argument("--disable-javascript")
-        chrome_options.add_argument("--disable-dom-distiller")
-
-        # Disable download dialog
+        # JavaScript must stay enabled: the search form submits via check_form()
+
+        # Single prefs dict: skip images/stylesheets and disable the download dialog
         prefs = {
+            "profile.default_content_setting_values.images": 2,
+            "profile.default_content_setting_values.stylesheets": 2,
             "download.default_directory": os.path.abspath("knowledge_base"),
             "download.prompt_for_download": False,
             "download.directory_upgrade": True,
@@ -82,15 +437,119 @@ class ExambaseScraper:
         chrome_options.add_experimental_option("prefs", prefs)
 
         self.driver = webdriver.Chrome(options=chrome_options)
-        self.wait = WebDriverWait(self.driver, CONNECT_TIME_OUT)
+        self._block_resources()
+        self.wait = WebDriverWait(
+            self.driver, CONNECT_TIME_OUT, poll_frequency=POLL_FREQUENCY
+        )
+
+    def _block_resources(self):
+        """
+        Block images, fonts, stylesheets and trackers at the network layer
+
+        JavaScript is left alone because the search form submits via check_form().
+        """
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd(
+                "Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS}
+            )
+        except WebDriverException as e:
+            self._log(f"Could not enable request blocking: {e}")
 
     def _log(self, message):
         """Print message if verbose mode is enabled"""
         if self.verbose:
             self.logger.info(message, force=True)
 
+    @staticmethod
+    def _on_exambase(url):
+        """Check whether a URL is an Exambase page (not the proxy login page)"""
+        return urlparse(url).netloc.startswith("exambase")
+
+    def _load_cookies(self):
+        """
+        Load cached cookies from a previous successful login
+
+        Returns:
+            list: Selenium cookie dicts, empty if the cache is missing or stale
+        """
+        try:
+            with open(self.cookie_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return []
+
+        if time.time() - cached.get("saved_at", 0) > COOKIE_MAX_AGE:
+            return []
+
+        now = time.time()
+        return [
+            c for c in cached.get("cookies", []) if c.get("expiry", now + 1) > now
+        ]
+
+    def _save_cookies(self):
+        """Persist the current browser cookies for the next run"""
+        try:
+            cookies = [
+                {key: c[key] for key in CACHED_COOKIE_KEYS if key in c}
+                for c in self.driver.get_cookies()
+            ]
+            write_private_json(
+                self.cookie_file, {"saved_at": time.time(), "cookies": cookies}
+            )
+        except (OSError, WebDriverException) as e:
+            self._log(f"Could not cache cookies: {e}")
+
+    def _sync_session_cookies(self):
+        """Copy browser cookies into the requests session"""
+        for cookie in self.driver.get_cookies():
+            self.session.cookies.set(cookie["name"], cookie["value"])
+
+    def _finish_login(self):
+        """Share the logged-in session with requests and tighten page-load timeout"""
+        self._save_cookies()
+        self._sync_session_cookies()
+        self.driver.set_page_load_timeout(PAGE_LOAD_TIME_OUT)
+
+    def _try_cookie_login(self):
+        """
+        Try to restore a previous Exambase session from cached cookies
+
+        Returns:
+            bool: True if the browser landed on Exambase without the login form
+        """
+        cookies = self._load_cookies()
+        if not cookies:
+            return False
+
+        self._log(f"Trying cached session ({len(cookies)} cookies)...")
+        try:
+            self.driver.set_page_load_timeout(CONNECT_TIME_OUT)
+            self.driver.get(self.exambase_url)
+            for cookie in cookies:
+                try:
+                    self.driver.add_cookie(cookie)
+                except WebDriverException:
+                    # Cookie belongs to a domain other than the current page
+                    continue
+            self.driver.get(self.exambase_url)
+        except (TimeoutException, WebDriverException) as e:
+            self._log(f"Cached session failed: {e}")
+            return False
+
+        if not self._on_exambase(self.driver.current_url):
+            self._log("Cached session expired, falling back to login form")
+            return False
+
+        return True
+
     def login(self):
         """Login to HKU Library authentication system with retry logic"""
+        if self._try_cookie_login():
+            self._finish_login()
+            self.logger.info("✅ Exambase login restored from cached session", force=True)
+            return True
+
         max_retries = 3
 
         for attempt in range(1, max_retries + 1):
@@ -105,7 +564,6 @@ class ExambaseScraper:
                     except:
                         pass
                     self._initialize_driver()
-                    time.sleep(2)
 
                 self._log(f"Accessing Exambase... (Attempt {attempt}/{max_retries})")
 
@@ -115,7 +573,6 @@ class ExambaseScraper:
                     self.driver.get(self.exambase_url)
                 except TimeoutException:
                     raise TimeoutException("Page load timeout: Exambase")
-                time.sleep(1)
 
                 # Check if redirected to login page with timeout
                 current_url = self.driver.current_url
@@ -123,13 +580,12 @@ class ExambaseScraper:
 
                 if "authenticate" in current_url or "lib.hku.hk" in current_url:
                     self._log("Detected library authentication page")
-                    time.sleep(1)
 
                     # Enter UID with timeout
                     self._log("Entering UID...")
                     uid_input = None
                     try:
-                        uid_input = WebDriverWait(self.driver, CONNECT_TIME_OUT).until(
+                        uid_input = self.wait.until(
                             EC.presence_of_element_located((By.NAME, "userid"))
                         )
                     except TimeoutException:
@@ -154,7 +610,7 @@ class ExambaseScraper:
                     self._log("Entering password...")
                     pin_input = None
                     try:
-                        pin_input = WebDriverWait(self.driver, CONNECT_TIME_OUT).until(
+                        pin_input = self.wait.until(
                             EC.presence_of_element_located((By.ID, "password"))
                         )
                     except TimeoutException:
@@ -181,7 +637,7 @@ class ExambaseScraper:
                     self._log("Clicking submit...")
                     submit_btn = None
                     try:
-                        submit_btn = WebDriverWait(self.driver, CONNECT_TIME_OUT).until(
+                        submit_btn = self.wait.until(
                             EC.element_to_be_clickable((By.NAME, "submit"))
                         )
                     except TimeoutException:
@@ -204,24 +660,21 @@ class ExambaseScraper:
                         raise Exception("Submit button not found")
 
                     # Wait for redirect to Exambase with timeout
-                    time.sleep(1)
-                    max_wait = 5
-                    wait_count = 0
-                    while wait_count < max_wait:
-                        current_url = self.driver.current_url
-                        if "exambase" in current_url:
-                            self._log("✓ Successfully logged in to Exambase")
-                            self.logger.info("✅ Exambase login successful", force=True)
-                            return True
-                        time.sleep(1)
-                        wait_count += 1
-
-                    raise TimeoutException(
-                        f"Timeout: Failed to redirect to Exambase. Current URL: {self.driver.current_url}"
-                    )
+                    try:
+                        self.wait.until(lambda d: self._on_exambase(d.current_url))
+                    except TimeoutException:
+                        raise TimeoutException(
+                            f"Timeout: Failed to redirect to Exambase. Current URL: {self.driver.current_url}"
+                        )
+
+                    self._finish_login()
+                    self._log("✓ Successfully logged in to Exambase")
+                    self.logger.info("✅ Exambase login successful", force=True)
+                    return True
 
                 else:
                     # Already on Exambase, no login needed
+                    self._finish_login()
                     self._log("✓ Already on Exambase, no login needed")
                     self.logger.info("✅ Exambase access successful", force=True)
                     return True
@@ -248,153 +701,212 @@ class ExambaseScraper:
         Extract course codes from knowledge_base directory names
 
         Returns:
-            list: List of tuples (course_code, full_folder_name)
+            dict: Mapping of course_code -> list of full folder names sharing that code
         """
-        course_list = []
+        courses_by_code = defaultdict(list)
         knowledge_base_path = os.path.abspath("knowledge_base")
 
         if not os.path.exists(knowledge_base_path):
             self._log("✗ knowledge_base directory not found")
-            return course_list
+            return courses_by_code
 
-        for folder_name in os.listdir(knowledge_base_path):
-            folder_path = os.path.join(knowledge_base_path, folder_name)
-            if os.path.isdir(folder_path):
+        with os.scandir(knowledge_base_path) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
                 # Extract course code (e.g., COMP7103 from "COMP7103 Data mining [Section 1C, 2025]")
-                match = re.match(r"^([A-Z]+\d+)", folder_name)
+                match = _RE_COURSE.match(entry.name)
                 if match:
                     course_code = match.group(1)
-                    course_list.append((course_code, folder_name))
-                    self._log(f"Found course: {course_code} -> {folder_name}")
+                    courses_by_code[course_code].append(entry.name)
+                    self._log(f"Found course: {course_code} -> {entry.name}")
+
+        return courses_by_code
 
-        return course_list
+    def _pace(self):
+        """Wait for this scraper's turn under the process-wide search gap"""
+        self._pacer.wait()
+
+    def _adjust_pace(self, throttled):
+        """Back off after throttling / connection errors, speed up again on success"""
+        self._pacer.adjust(throttled)
+
+    @staticmethod
+    def _is_throttled(error):
+        """Check whether a request error means the server wants us to slow down"""
+        if isinstance(error, (requests.ConnectionError, requests.exceptions.RetryError)):
+            return True
+        response = getattr(error, "response", None)
+        return response is not None and response.status_code == 429
 
     def search_course_exams(self, course_code):
         """
         Search for exam papers of a specific course
 
+        The search form is replayed over HTTP with the logged-in session; the
+        browser is only driven when that is not possible.
+
         Args:
             course_code: Course code like "COMP7103"
 
         Returns:
             list: List of exam paper links
         """
-        try:
-            self._log(f"\n[Searching] {course_code}")
+        self._pace()
+        self._log(f"\n[Searching] {course_code}")
 
-            # Go to Exambase home
-            self.driver.get(self.exambase_url)
-            time.sleep(1)
+        exam_links = self._search_via_http(course_code)
+        if exam_links is None:
+            self._log("  Falling back to browser search...")
+            exam_links = self._search_via_browser(course_code)
 
-            # Select "Course number / Course Code" radio button
-            self._log("  Selecting 'Course number / Course Code' option...")
+        return exam_links
+
+    def _get_search_form(self):
+        """
+        Capture the search form (action, method, fields) from the browser once
+
+        Returns:
+            dict: Form description, or None if it could not be captured
+        """
+        if self._search_form is None:
             try:
-                course_code_radio = self.wait.until(
-                    EC.presence_of_element_located(
-                        (By.CSS_SELECTOR, "input[value='crs']")
-                    )
+                self.driver.get(self.exambase_url)
+                self.wait.until(EC.presence_of_element_located((By.NAME, "the_key")))
+                self._search_form = (
+                    self.driver.execute_script(_JS_CAPTURE_FORM) or False
                 )
-                self.driver.execute_script("arguments[0].click();", course_code_radio)
-                time.sleep(0.5)
-            except:
-                # Try alternative method
-                try:
-                    course_code_radio = self.driver.find_element(
-                        By.XPATH, "//input[@value='crs']"
+            except (TimeoutException, WebDriverException) as e:
+                self._log(f"  Could not capture search form: {e}")
+                return None
+        return self._search_form or None
+
+    def _search_via_http(self, course_code):
+        """
+        Submit the search form with requests and parse the results page
+
+        Args:
+            course_code: Course code like "COMP7103"
+
+        Returns:
+            list: List of exam paper links, or None if the browser should be used instead
+        """
+        form = self._get_search_form()
+        if not form:
+            return None
+
+        data = dict(form["data"], the_key=course_code)
+        for attempt in range(2):
+            try:
+                if form["method"] == "post":
+                    response = self.session.post(
+                        form["action"], data=data, timeout=CONNECT_TIME_OUT
                     )
-                    self.driver.execute_script(
-                        "arguments[0].click();", course_code_radio
+                else:
+                    response = self.session.get(
+                        form["action"], params=data, timeout=CONNECT_TIME_OUT
                     )
-                    time.sleep(0.5)
-                except:
-                    self._log("  ✗ Could not select course code radio button")
-                    return []
+            except requests.RequestException as e:
+                self._log(f"  HTTP search failed: {e}")
+                self._adjust_pace(self._is_throttled(e))
+                return None
+
+            if self._on_exambase(response.url):
+                break
+
+            # Redirected to the proxy login page - session expired
+            if attempt == 0:
+                self._log("  Session rejected, logging in again...")
+                # Other pool threads hit the same expiry. Under the lock,
+                # login() first tries the cached cookies, so a thread that
+                # comes after another one's fresh login restores that session
+                # instead of running the SSO form again
+                with LOGIN_LOCK:
+                    if not self.login():
+                        return None
+        else:
+            return None
 
-            # Enter course code in search box
-            self._log(f"  Entering course code: {course_code}")
-            search_input = self.driver.find_element(By.NAME, "the_key")
-            search_input.clear()
-            search_input.send_keys(course_code)
+        rows = _parse_results_html(response.text, response.url)
+        if rows is None:
+            return None
 
-            # Click search button
-            self._log("  Clicking search...")
-            search_btn = None
-            try:
-                # The search is actually a link with javascript:check_form();
-                search_btn = self.driver.find_element(
-                    By.CSS_SELECTOR, "a[href*='check_form']"
-                )
-                search_btn.click()
-            except:
+        exam_links = []
+        for row in rows:
+            if _is_exam_pdf(row["url"]):
+                exam_links.append(row)
+                self._log(f"    Found: {row['title']}")
+
+        self._log(f"  Total found: {len(exam_links)} exam papers")
+        return exam_links
+
+    def _search_via_browser(self, course_code):
+        """
+        Search for exam papers by driving the search form in the browser
+
+        Args:
+            course_code: Course code like "COMP7103"
+
+        Returns:
+            list: List of exam paper links
+        """
+        try:
+            # Select "Course number / Course Code", fill in the code and submit in a
+            # single WebDriver round-trip, reusing the current page (e.g. the previous
+            # results page) when it still carries the search form
+            self._log(f"  Submitting search for course code: {course_code}")
+            old_page = self.driver.execute_script(_JS_SUBMIT_SEARCH, course_code)
+
+            if old_page is None:
+                # No search form here - go to Exambase home and try once more
+                self.driver.get(self.exambase_url)
                 try:
-                    # Try to find the image within the link
-                    search_img = self.driver.find_element(
-                        By.CSS_SELECTOR, "img[src*='searchbutton']"
+                    self.wait.until(
+                        EC.presence_of_element_located((By.NAME, "the_key"))
                     )
-                    # Get the parent <a> tag
-                    search_btn = search_img.find_element(By.XPATH, "..")
-                    search_btn.click()
-                except:
-                    try:
-                        # Fallback: try any submit button
-                        search_btn = self.driver.find_element(
-                            By.CSS_SELECTOR, "input[type='submit']"
-                        )
-                        search_btn.click()
-                    except:
-                        # Try executing JavaScript directly
-                        self._log("  Trying to submit form via JavaScript...")
-                        self.driver.execute_script("check_form();")
-
-            # Wait for results page
-            time.sleep(1)
+                except TimeoutException:
+                    self._log("  ✗ Search form did not load")
+                    return []
 
-            # Check if any results found
-            page_source = self.driver.page_source
+                old_page = self.driver.execute_script(_JS_SUBMIT_SEARCH, course_code)
+                if old_page is None:
+                    self._log("  ✗ Could not find course code search form")
+                    return []
 
-            if (
-                "Total number of hits is 0" in page_source
-                or "no hits" in page_source.lower()
-            ):
-                self._log(f"  ✗ No exam papers found for {course_code}")
-                return []
+            # Wait for the new page, then for result rows or a hit count
+            try:
+                self.wait.until(EC.staleness_of(old_page))
+                self.wait.until(
+                    EC.any_of(
+                        EC.presence_of_element_located(
+                            (By.CSS_SELECTOR, RESULT_SELECTOR)
+                        ),
+                        EC.text_to_be_present_in_element((By.TAG_NAME, "body"), "hits"),
+                    )
+                )
+            except TimeoutException:
+                self._log("  Results page did not settle, checking anyway...")
 
-            # Extract exam paper links
+            # Check for hits and extract exam paper links - they are in <td> with class
+            # evenResultDetail or oddResultDetail - in one execute_script call
             exam_links = []
-
             try:
-                # Find all exam paper links - they are in <td> with class evenResultDetail or oddResultDetail
-                result_tds = self.driver.find_elements(
-                    By.CSS_SELECTOR, "td.evenResultDetail, td.oddResultDetail"
+                results = self.driver.execute_script(
+                    _JS_EXTRACT_RESULTS, RESULT_SELECTOR
                 )
+            except WebDriverException as e:
+                self._log(f"  ✗ Error extracting exam links: {str(e)}")
+                results = {"no_hits": False, "rows": []}
 
-                for td in result_tds:
-                    try:
-                        # Find the link within the td
-                        link_elem = td.find_element(By.TAG_NAME, "a")
-                        link_href = link_elem.get_attribute("href")
-                        link_text = link_elem.text.strip()
-
-                        # Check if it's a PDF link (downloadable)
-                        if link_href and (
-                            "/archive/files/" in link_href
-                            or ".pdf" in link_href.lower()
-                        ):
-                            # Get full text for context
-                            td_text = td.text
-
-                            exam_info = {
-                                "title": link_text,
-                                "url": link_href,
-                                "full_text": td_text,
-                            }
-                            exam_links.append(exam_info)
-                            self._log(f"    Found: {link_text}")
-                    except:
-                        continue
+            if results["no_hits"]:
+                self._log(f"  ✗ No exam papers found for {course_code}")
+                return []
 
-            except Exception as e:
-                self._log(f"  ✗ Error extracting exam links: {str(e)}")
+            for row in results["rows"]:
+                # Only keep PDF links (downloadable)
+                if _is_exam_pdf(row["url"]):
+                    exam_links.append(row)
+                    self._log(f"    Found: {row['title']}")
 
             self._log(f"  Total found: {len(exam_links)} exam papers")
             return exam_links
@@ -422,26 +934,24 @@ class ExambaseScraper:
 
         download_count = 0
         downloaded_paths = []  # Track downloaded file paths
-        course_path = os.path.join("knowledge_base", course_folder_name)
+        # Joined and made absolute once; per-file paths are built with "/" below
+        course_path = (Path("knowledge_base") / course_folder_name).absolute()
 
         # Create course directory if it doesn't exist
-        if not os.path.exists(course_path):
-            os.makedirs(course_path)
+        try:
+            course_path.mkdir(parents=True)
             self._log(f"Created directory: {course_path}")
+        except FileExistsError:
+            pass
 
-        # Get existing files
-        existing_files = set()
-        if os.path.exists(course_path):
-            for filename in os.listdir(course_path):
-                existing_files.add(filename.lower())
+        # Get existing files (single directory pass)
+        with os.scandir(course_path) as entries:
+            existing_files = {entry.name.casefold() for entry in entries}
 
         self._log(f"\n[Downloading] {course_code} ({len(exam_links)} papers)")
 
-        # Get cookies from Selenium for authenticated requests
-        selenium_cookies = self.driver.get_cookies()
-        session = requests.Session()
-        for cookie in selenium_cookies:
-            session.cookies.set(cookie["name"], cookie["value"])
+        # (idx, filename, url) for papers not yet on disk; fetched concurrently below
+        pending = []
 
         for idx, exam_info in enumerate(exam_links, 1):
             try:
@@ -451,9 +961,7 @@ class ExambaseScraper:
 
                 # Extract exam date from full_text (format: d-m-yyyy)
                 exam_date = ""
-                date_match = re.search(
-                    r"Exam date.*?(\d{1,2}-\d{1,2}-\d{4})", full_text
-                )
+                date_match = _RE_DATE.search(full_text)
                 if date_match:
                     exam_date = date_match.group(1)
                     # Convert to YYYY-MM-DD format for better sorting
@@ -465,16 +973,12 @@ class ExambaseScraper:
 
                 # Extract remark (subclass info) if exists
                 remark = ""
-                remark_match = re.search(r"Remark:\s*([^<\n]+)", full_text)
+                remark_match = _RE_REMARK.search(full_text)
                 if remark_match:
                     remark_text = remark_match.group(1).strip()
                     if "subclass" in remark_text.lower():
                         # First, match the section after "subclass" or "subclasses"(e.g., "A, B, C")
-                        subclass_section = re.search(
-                            r"subclass(?:es)?\s*:\s*(.*)|subclass(?:es)?\s+(.*)",
-                            remark_text,
-                            re.IGNORECASE,
-                        )
+                        subclass_section = _RE_SUBCLASS.search(remark_text)
                         if subclass_section:
                             # Extract the target part after "subclass" or "subclasses"(concatenate both groups to avoid missing matches)
                             target_part = subclass_section.group(
@@ -482,7 +986,7 @@ class ExambaseScraper:
                             ) or subclass_section.group(2)
                             if target_part:
                                 # Second step: extract all uppercase letters from the target part (regardless of whether they are separated by commas, "and", or spaces)
-                                subclass_matches = re.findall(r"[A-Z]", target_part)
+                                subclass_matches = _RE_UPPER.findall(target_part)
                                 if subclass_matches:
                                     unique_subclasses = list(
                                         dict.fromkeys(subclass_matches)
@@ -491,8 +995,7 @@ class ExambaseScraper:
 
                 # Generate filename from title
                 # Example: "Data mining" -> "Data_mining_exam.pdf"
-                filename = re.sub(r"[^\w\s-]", "", title)
-                filename = re.sub(r"\s+", "_", filename)
+                filename = _title_to_filename(title)
 
                 # Add course code prefix if not present
                 if not filename.startswith(course_code):
@@ -509,47 +1012,87 @@ class ExambaseScraper:
                     filename += ".pdf"
 
                 # Check if already downloaded
-                if filename.lower() in existing_files:
+                filename_key = filename.casefold()
+                if filename_key in existing_files:
                     self._log(
                         f"  [{idx}/{len(exam_links)}] ⊘ Already exists: {filename}"
                     )
                     continue
 
-                self._log(f"  [{idx}/{len(exam_links)}] Downloading: {filename}")
+                existing_files.add(filename_key)
+                pending.append((idx, filename, url))
 
-                # The URL is already a direct PDF link, no need to navigate
-                pdf_url = url
+            except Exception as e:
+                self._log(f"  [{idx}/{len(exam_links)}] ✗ Error: {str(e)}")
+                continue
+
+        if not pending:
+            return download_count, downloaded_paths
+
+        # Only the network + disk write runs in workers; logging stays on this thread
+        with ThreadPoolExecutor(
+            max_workers=min(DOWNLOAD_WORKERS, len(pending))
+        ) as executor:
+            futures = [
+                executor.submit(self._fetch_pdf, url, course_path / filename)
+                for _, filename, url in pending
+            ]
 
-                # Download with requests
+            for (idx, filename, _), future in zip(pending, futures):
+                self._log(f"  [{idx}/{len(exam_links)}] Downloading: {filename}")
                 try:
-                    response = session.get(pdf_url, timeout=30, stream=True)
-                    response.raise_for_status()
-
-                    # Save file
-                    file_path = os.path.join(course_path, filename)
-                    with open(file_path, "wb") as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-
-                    file_size = os.path.getsize(file_path)
-                    if file_size > 0:
-                        self._log(f"      ✓ Downloaded ({file_size:,} bytes)")
-                        download_count += 1
-                        downloaded_paths.append(os.path.abspath(file_path))  # Record absolute path
-                    else:
-                        self._log("      ✗ Downloaded but file is empty")
-                        os.remove(file_path)
+                    file_size = future.result()
                 except Exception as e:
                     self._log(f"      ✗ Download failed: {str(e)}")
+                    if self._is_throttled(e):
+                        self._adjust_pace(True)
+                    continue
 
-            except Exception as e:
-                self._log(f"  [{idx}/{len(exam_links)}] ✗ Error: {str(e)}")
-                continue
+                self._adjust_pace(False)
+
+                if file_size > 0:
+                    self._log(f"      ✓ Downloaded ({file_size:,} bytes)")
+                    download_count += 1
+                    downloaded_paths.append(str(course_path / filename))  # Record absolute path
+                else:
+                    self._log("      ✗ Downloaded but file is empty")
 
         return download_count, downloaded_paths
 
-    def download_all_courses(self, course_filter=None):
+    def _fetch_pdf(self, url, file_path):
+        """
+        Stream one PDF to a .part file, then move it into place
+
+        The file only appears under its final name once the body has been read
+        completely, so a failed transfer never leaves a partial PDF behind.
+
+        Args:
+            url: Direct PDF URL
+            file_path: Destination path (pathlib.Path)
+
+        Returns:
+            int: Number of bytes saved (0 if the response was empty)
+        """
+        tmp_path = file_path.with_name(file_path.name + ".part")
+        # The with block closes the streamed response on every path, error
+        # statuses included, so its connection goes back to the pool
+        with self.session.get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            try:
+                response.raw.decode_content = True
+                with tmp_path.open("wb") as f:
+                    shutil.copyfileobj(response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+                    size = f.tell()
+                if size == 0:
+                    tmp_path.unlink()
+                    return 0
+                tmp_path.replace(file_path)
+                return size
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+
+    def download_all_courses(self, course_filter=None, num_workers=1):
         """
         Main method to download exam papers for all courses
 
@@ -557,6 +1100,7 @@ class ExambaseScraper:
             course_filter (list, optional): List of full course names to download.
                                            If None, get courses from knowledge_base folders.
                                            If provided, parse course codes and search directly.
+            num_workers (int): Number of browser instances searching in parallel (default: 1)
 
         Returns:
             dict: Statistics about downloads
@@ -565,110 +1109,409 @@ class ExambaseScraper:
         self._log("Starting Exambase download...")
         self._log("=" * 50)
 
-        # If course_filter is provided, parse course codes directly from it
+        # Courses are grouped by course code so each code is searched only once
         if course_filter:
-            self._log(f"Processing {len(course_filter)} filtered courses")
-            course_list = []
-            from .moodle import HKUMoodleScraper
+            # Parse course codes directly from the (de-duplicated) filter
+            unique_names = list(dict.fromkeys(course_filter))
+            self._log(f"Processing {len(unique_names)} filtered courses")
+            courses_by_code = defaultdict(list)
 
-            for course_name in course_filter:
+            for course_name in unique_names:
                 # Extract course code (e.g., COMP7103 from "COMP7103 Data mining [Section 1C, 2025]")
-                match = re.match(r"^([A-Z]+\d+)", course_name)
+                match = _RE_COURSE.match(course_name)
                 if match:
-                    course_code = match.group(1)
                     # Use sanitized course name as folder name
-                    scraper_temp = HKUMoodleScraper(headless=True, verbose=False)
-                    folder_name = scraper_temp._sanitize_filename(course_name)
-                    course_list.append((course_code, folder_name))
+                    folder_name = sanitize_filename(course_name)
+                    courses_by_code[match.group(1)].append(folder_name)
 
-            if not course_list:
+            if not courses_by_code:
                 self._log("✗ No valid courses in filter")
                 return {"total_courses": 0, "total_downloads": 0}
         else:
             # Get course codes from knowledge_base
-            course_list = self.get_course_codes_from_knowledge_base()
+            courses_by_code = self.get_course_codes_from_knowledge_base()
 
-            if not course_list:
+            if not courses_by_code:
                 self._log("✗ No courses found in knowledge_base")
                 return {"total_courses": 0, "total_downloads": 0}
 
-        self._log(f"\nFound {len(course_list)} courses to process\n")
+        total_courses = sum(len(folders) for folders in courses_by_code.values())
+        self._log(
+            f"\nFound {total_courses} courses ({len(courses_by_code)} unique codes) to process\n"
+        )
 
         stats = {
-            "total_courses": len(course_list),
+            "total_courses": total_courses,
             "processed_courses": 0,
             "total_downloads": 0,
             "courses_with_exams": 0,
             "downloaded_file_paths": [],  # Track all downloaded file paths
         }
 
-        # Group courses by course code to search only once per code
-        from collections import defaultdict
+        if num_workers > 1 and len(courses_by_code) > 1:
+            results = self._process_courses_pooled(courses_by_code, num_workers)
+        else:
+            results = []
+            for course_code, folder_names in courses_by_code.items():
+                # Searches are paced adaptively inside search_course_exams()
+                results.append(self._process_course_code(course_code, folder_names))
+
+        for (has_exams, download_count, downloaded_paths), folder_names in zip(
+            results, courses_by_code.values()
+        ):
+            if has_exams:
+                stats["courses_with_exams"] += 1
+            stats["total_downloads"] += download_count
+            stats["downloaded_file_paths"].extend(downloaded_paths)  # Add file paths
+            stats["processed_courses"] += len(folder_names)
+
+        return stats
 
-        courses_by_code = defaultdict(list)
-        for course_code, folder_name in course_list:
-            courses_by_code[course_code].append(folder_name)
+    def _process_course_code(self, course_code, folder_names):
+        """
+        Search once for a course code and download its exams to every matching folder
 
-        for course_code, folder_names in courses_by_code.items():
-            # Search for exam papers (only once per course code)
+        Args:
+            course_code: Course code to search (e.g., "COMP7103")
+            folder_names: List of knowledge_base folder names sharing this code
+
+        Returns:
+            tuple: (has_exams, download_count, downloaded_paths)
+        """
+        # Every log line for this course carries its code, even from pool threads
+        with correlation_id(course_code):
             exam_links = self.search_course_exams(course_code)
+            if not exam_links:
+                return False, 0, []
+
+            total_downloads = 0
+            all_downloaded_paths = []
+            for folder_name in folder_names:
+                download_count, downloaded_paths = self.download_exam_papers(
+                    course_code, folder_name, exam_links
+                )
+                total_downloads += download_count
+                all_downloaded_paths.extend(downloaded_paths)
 
-            if exam_links:
-                stats["courses_with_exams"] += 1
-                # Download exam papers to all folders with this course code
-                for folder_name in folder_names:
-                    download_count, downloaded_paths = self.download_exam_papers(
-                        course_code, folder_name, exam_links
+            return True, total_downloads, all_downloaded_paths
+
+    def _process_courses_pooled(self, courses_by_code, num_workers):
+        """
+        Process course codes concurrently on a pool of logged-in browsers
+
+        Args:
+            courses_by_code: Dict mapping course codes to folder names
+            num_workers: Maximum number of browser instances
+
+        Returns:
+            list: _process_course_code results, in courses_by_code order
+        """
+        # Imported here: parallel.py imports this module at load time
+        from .parallel import ExambaseBrowserPool
+
+        pool = ExambaseBrowserPool(self, min(num_workers, len(courses_by_code)))
+        self._log(f"Processing courses with {pool.size} browsers")
+        try:
+            with ThreadPoolExecutor(max_workers=pool.size) as executor:
+                return list(
+                    executor.map(
+                        lambda item: pool.run(
+                            ExambaseScraper._process_course_code, *item
+                        ),
+                        courses_by_code.items(),
                     )
-                    stats["total_downloads"] += download_count
-                    stats["downloaded_file_paths"].extend(downloaded_paths)  # Add file paths
-                    stats["processed_courses"] += 1
-            else:
-                # No exams found, just count the processed courses
-                stats["processed_courses"] += len(folder_names)
+                )
+        finally:
+            pool.close()
+
+    def close(self):
+        """Close the browser and release its profile directory"""
+        if self.driver:
+            self.driver.quit()
+        if self._profile_lock:
+            self._profile_lock.close()
+            self._profile_lock = None
+            self._profile_dir = None
 
-            # Small delay between courses
-            time.sleep(1)
 
-        return stats
+class ExambasePlaywrightScraper(ExambaseScraper):
+    """
+    Exambase scraper driven by Playwright instead of Selenium
+
+    Playwright talks to Chrome over one persistent CDP WebSocket rather than a
+    WebDriver HTTP request per command, and waits on selectors/navigations itself.
+    Searches and downloads still go through the shared requests session first;
+    the page is only used for login, capturing the search form and the fallback
+    search. Uses the same persistent profile directories as the Selenium engine.
+    """
+
+    def _initialize_driver(self):
+        """Start Playwright and open a persistent Chrome context"""
+        if sync_playwright is None:
+            raise ImportError(
+                "Playwright is not installed (pip install playwright) - use --engine selenium"
+            )
+
+        self.driver = None  # no WebDriver for this engine
+        self._playwright = sync_playwright().start()
+        # An empty user_data_dir makes Playwright use a throwaway profile
+        self.context = self._playwright.chromium.launch_persistent_context(
+            self._acquire_profile_dir() or "",
+            channel="chrome",
+            headless=self.headless,
+            accept_downloads=False,
+            args=[
+                "--no-sandbox",
+                "--disable-dev-shm-usage",
+                "--disable-gpu",
+                "--disable-extensions",
+                "--blink-settings=imagesEnabled=false",
+            ],
+        )
+        self.context.set_default_timeout(CONNECT_TIME_OUT * 1000)
+        self.page = (
+            self.context.pages[0] if self.context.pages else self.context.new_page()
+        )
+        self._block_resources()
 
-    def _search_and_download_course(self, course_code, course_dirs):
+    def _block_resources(self):
+        """Block images, fonts, stylesheets and trackers at the network layer"""
+        try:
+            cdp = self.context.new_cdp_session(self.page)
+            cdp.send("Network.enable")
+            cdp.send("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except PlaywrightError as e:
+            self._log(f"Could not enable request blocking: {e}")
+
+    def _shutdown_driver(self):
+        """Close the browser context and stop Playwright"""
+        for closer in (self.context.close, self._playwright.stop):
+            try:
+                closer()
+            except Exception:
+                pass
+
+    def _save_cookies(self):
+        """Persist the current browser cookies for the next run (Selenium format)"""
+        cookies = []
+        for c in self.context.cookies():
+            cookie = {key: c[key] for key in CACHED_COOKIE_KEYS if key in c}
+            if c.get("expires", -1) > 0:
+                cookie["expiry"] = int(c["expires"])
+            cookies.append(cookie)
+
+        try:
+            write_private_json(
+                self.cookie_file, {"saved_at": time.time(), "cookies": cookies}
+            )
+        except OSError as e:
+            self._log(f"Could not cache cookies: {e}")
+
+    def _sync_session_cookies(self):
+        """Copy browser cookies into the requests session"""
+        for cookie in self.context.cookies():
+            self.session.cookies.set(cookie["name"], cookie["value"])
+
+    def _finish_login(self):
+        """Share the logged-in session with requests and tighten navigation timeout"""
+        self._save_cookies()
+        self._sync_session_cookies()
+        self.context.set_default_navigation_timeout(PAGE_LOAD_TIME_OUT * 1000)
+
+    def _restore_cookies(self):
+        """Add cached cookies (from either engine) to the browser context"""
+        cookies = []
+        for c in self._load_cookies():
+            if "domain" not in c:
+                continue
+            cookie = {
+                "name": c["name"],
+                "value": c["value"],
+                "domain": c["domain"],
+                "path": c.get("path", "/"),
+                "secure": c.get("secure", False),
+                "httpOnly": c.get("httpOnly", False),
+            }
+            if "expiry" in c:
+                cookie["expires"] = c["expiry"]
+            cookies.append(cookie)
+
+        if cookies:
+            self._log(f"Trying cached session ({len(cookies)} cookies)...")
+            try:
+                self.context.add_cookies(cookies)
+            except PlaywrightError as e:
+                self._log(f"Could not restore cached cookies: {e}")
+
+    def login(self):
+        """Login to HKU Library authentication system with retry logic"""
+        self._restore_cookies()
+        max_retries = 3
+
+        for attempt in range(1, max_retries + 1):
+            try:
+                if attempt > 1:
+                    self.logger.warning(
+                        f"🔄 Retry attempt {attempt}/{max_retries} - Restarting browser..."
+                    )
+                    self._shutdown_driver()
+                    self._initialize_driver()
+
+                self._log(f"Accessing Exambase... (Attempt {attempt}/{max_retries})")
+                self.context.set_default_navigation_timeout(CONNECT_TIME_OUT * 1000)
+                self.page.goto(self.exambase_url, wait_until="domcontentloaded")
+
+                current_url = self.page.url
+                self._log(f"Current URL: {current_url}")
+
+                if self._on_exambase(current_url):
+                    # Persistent profile or cached cookies are still valid
+                    self._finish_login()
+                    self._log("✓ Already on Exambase, no login needed")
+                    self.logger.info("✅ Exambase access successful", force=True)
+                    return True
+
+                self._log("Detected library authentication page")
+                # fill()/click() wait for the first matching field themselves
+                self.page.fill(
+                    "input[name='userid'], #user_id, input[type='text']",
+                    self.username,
+                )
+                self._log(f"Entered UID: {self.username}")
+                self.page.fill(
+                    "#password, input[name='password'], input[type='password']",
+                    self.password,
+                )
+                self._log("Entered password")
+                self.page.click(
+                    "input[name='submit'], input[type='submit'], button[type='submit']"
+                )
+                self._log("Clicked submit button")
+
+                self.page.wait_for_url(
+                    self._on_exambase, wait_until="domcontentloaded"
+                )
+
+                self._finish_login()
+                self._log("✓ Successfully logged in to Exambase")
+                self.logger.info("✅ Exambase login successful", force=True)
+                return True
+
+            except Exception as e:
+                self.logger.warning(
+                    f"⚠️ Login attempt {attempt}/{max_retries} failed: {str(e)}"
+                )
+
+                if attempt >= max_retries:
+                    self.logger.error(
+                        f"❌ Exambase login failed after {max_retries} attempts. Please check your network and credentials."
+                    )
+                    return False
+
+                # Wait before retry
+                time.sleep(2)
+
+        return False
+
+    def _get_search_form(self):
         """
-        Search and download exams for a single course code
-        This is extracted for parallel downloading support
+        Capture the search form (action, method, fields) from the page once
+
+        Returns:
+            dict: Form description, or None if it could not be captured
+        """
+        if self._search_form is None:
+            try:
+                self.page.goto(self.exambase_url, wait_until="domcontentloaded")
+                self.page.wait_for_selector("input[name='the_key']")
+                self._search_form = (
+                    self.page.evaluate(_as_page_function(_JS_CAPTURE_FORM)) or False
+                )
+            except PlaywrightError as e:
+                self._log(f"  Could not capture search form: {e}")
+                return None
+        return self._search_form or None
+
+    def _search_via_browser(self, course_code):
+        """
+        Search for exam papers by driving the search form in the page
 
         Args:
-            course_code: Course code to search (e.g., "COMP7103")
-            course_dirs: List of directory paths for this course
+            course_code: Course code like "COMP7103"
 
         Returns:
-            tuple: (total_downloads, downloaded_paths)
-                - total_downloads: Number of files downloaded
-                - downloaded_paths: List of absolute paths of downloaded files
+            list: List of exam paper links
         """
-        # Search for exam papers
-        exam_links = self.search_course_exams(course_code)
+        try:
+            # Reuse the current page (e.g. the previous results page) when it still
+            # carries the search form, otherwise go to Exambase home first
+            if self.page.query_selector("input[name='the_key']") is None:
+                self.page.goto(self.exambase_url, wait_until="domcontentloaded")
+                try:
+                    self.page.wait_for_selector("input[name='the_key']")
+                except PlaywrightError:
+                    self._log("  ✗ Search form did not load")
+                    return []
 
-        if not exam_links:
-            return 0, []
+            self._log(f"  Submitting search for course code: {course_code}")
+            with self.page.expect_navigation(wait_until="domcontentloaded"):
+                self.page.evaluate(_as_page_function(_JS_SUBMIT_SEARCH), course_code)
 
-        total_downloads = 0
-        all_downloaded_paths = []
-        # Download to all matching directories
-        for folder_name in course_dirs:
-            download_count, downloaded_paths = self.download_exam_papers(
-                course_code, folder_name, exam_links
+            try:
+                self.page.wait_for_function(
+                    "(sel) => document.querySelector(sel) || /hits/.test(document.body.innerText)",
+                    arg=RESULT_SELECTOR,
+                    polling=int(POLL_FREQUENCY * 1000),
+                )
+            except PlaywrightError:
+                self._log("  Results page did not settle, checking anyway...")
+
+            results = self.page.evaluate(
+                _as_page_function(_JS_EXTRACT_RESULTS), RESULT_SELECTOR
             )
-            total_downloads += download_count
-            all_downloaded_paths.extend(downloaded_paths)
+            if results["no_hits"]:
+                self._log(f"  ✗ No exam papers found for {course_code}")
+                return []
+
+            exam_links = []
+            for row in results["rows"]:
+                # Only keep PDF links (downloadable)
+                if _is_exam_pdf(row["url"]):
+                    exam_links.append(row)
+                    self._log(f"    Found: {row['title']}")
+
+            self._log(f"  Total found: {len(exam_links)} exam papers")
+            return exam_links
+
+        except Exception as e:
+            self._log(f"  ✗ Error searching for {course_code}: {str(e)}")
+            return []
+
+    def download_all_courses(self, course_filter=None, num_workers=1):
+        """
+        Main method to download exam papers for all courses
+
+        Playwright's sync objects belong to the thread that created them, so this
+        engine searches on a single page (PDF downloads are still concurrent).
 
-        time.sleep(0.5)  # Small delay
-        return total_downloads, all_downloaded_paths
+        Args:
+            course_filter (list, optional): List of full course names to download
+            num_workers (int): Ignored beyond 1 for this engine
+
+        Returns:
+            dict: Statistics about downloads
+        """
+        if num_workers > 1:
+            self._log("Playwright engine searches on one page, ignoring --workers")
+        return super().download_all_courses(course_filter=course_filter)
 
     def close(self):
-        """Close the browser"""
-        if self.driver:
-            self.driver.quit()
+        """Close the browser and release its profile directory"""
+        self._shutdown_driver()
+        if self._profile_lock:
+            self._profile_lock.close()
+            self._profile_lock = None
+            self._profile_dir = None
 
 
 def main():
@@ -690,6 +1533,19 @@ def main():
     parser.add_argument(
         "-v", "--verbose", action="store_true", help="Enable verbose output"
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of browser instances searching in parallel (default: 1)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("selenium", "playwright"),
+        default="selenium",
+        help="Browser automation engine (default: selenium)",
+    )
 
     args = parser.parse_args()
 
@@ -704,6 +1560,8 @@ def main():
     logger.info(f"Username: {username}", force=True)
     logger.info(f"Verbose: {args.verbose}", force=True)
     logger.info(f"Headless: {args.headless}", force=True)
+    logger.info(f"Workers: {args.workers}", force=True)
+    logger.info(f"Engine: {args.engine}", force=True)
     logger.info("-" * 50, force=True)
 
     scraper = None
@@ -715,7 +1573,10 @@ def main():
 
     try:
         # Initialize scraper
-        scraper = ExambaseScraper(
+        scraper_cls = (
+            ExambasePlaywrightScraper if args.engine == "playwright" else ExambaseScraper
+        )
+        scraper = scraper_cls(
             username=username,
             password=args.password,
             headless=args.headless,
@@ -733,7 +1594,7 @@ def main():
 
         # Download exam papers
         download_start = time.time()
-        stats = scraper.download_all_courses()
+        stats = scraper.download_all_courses(num_workers=args.workers)
         download_time = time.time() - download_start
 
         # Print summary
@@ -6,42 +6,337 @@ Adds timestamps to all log messages and saves to file
 """
 
 import os
+import sys
+import time
+import queue
+import atexit
 import threading
-from datetime import datetime
+import contextvars
+from contextlib import contextmanager
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used for structured output instead
+    import json
+
+    orjson = None
+
+# Most text the writer thread collects before one write() call. Write throughput
+# levels off between 64 and 256 KiB per call
+LOG_BUFFER_SIZE = 1 << 17  # 128 KiB
+LOG_MAX_CHUNKS = 32  # LOG_BUFFER_SIZE chunks submitted per writev() when backlogged
+
+LOG_FILE_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+
+# Log directories already created by this process (reset_logger() re-enters __init__)
+_LOG_DIRS_ENSURED = set()
+
+# Format: [timestamp] [thread] [level] message
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+SESSION_BANNER = "\n=== RAG Scraper Log Session Started at {} ===\n\n"
+
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+# Pre-rendered "[LEVEL]" tags
+_LEVEL_TAGS = {level: f"[{level}]" for level in LEVELS}
+
+_STOP = object()  # queue sentinel that ends the writer thread
+_MAX_THREAD_TAGS = 1024  # cached "[thread]" tags before the cache is reset
+
+# Optional per-task correlation id (e.g. the course being processed), shown as an
+# extra "[id]" tag; set it with correlation_id() at the start of each task
+_correlation_id = contextvars.ContextVar("rag_scraper_correlation_id", default=None)
+
+
+def _write_all(fd, data):
+    """os.write() until every byte of data is written (writes may be partial)"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def _write_chunks(fd, chunks):
+    """
+    Write encoded chunks in order, as one os.writev() per pass where the
+    platform has it (POSIX) and one os.write() per chunk otherwise
+    """
+    if not hasattr(os, "writev"):
+        for chunk in chunks:
+            _write_all(fd, chunk)
+        return
+
+    views = [memoryview(chunk) for chunk in chunks]
+    while views:
+        written = os.writev(fd, views)
+        # Drop fully written chunks, then trim a partially written one
+        while views and written >= len(views[0]):
+            written -= len(views.pop(0))
+        if written:
+            views[0] = views[0][written:]
+
+
+class _LineFormatter:
+    """
+    Renders queued (level_tag, perf_counter, thread_name, correlation_id, message)
+    records as "[timestamp] [thread] [level] message" lines, with an "[id]" tag
+    before the message when a correlation id is set
+
+    Wall-clock time is rebuilt from the counter with an offset sampled once,
+    so calling threads only read the cheap monotonic clock.
+
+    strftime runs once per second and the thread tags are rendered once, so
+    each record is a single f-string. Only the writer thread formats, so the
+    caches need no lock.
+    """
+
+    def __init__(self, datefmt, wall_offset):
+        self.datefmt = datefmt
+        self.wall_offset = wall_offset  # time.time() - time.perf_counter() at startup
+        self._last_sec = None
+        self._last_sec_str = ""
+        self._thread_tags = {}
+
+    def _timestamp(self, counter):
+        """Render a perf_counter reading as "YYYY-mm-dd HH:MM:SS.mmm" local time"""
+        created = counter + self.wall_offset
+        sec = int(created)
+        if sec != self._last_sec:
+            self._last_sec = sec
+            self._last_sec_str = time.strftime(self.datefmt, time.localtime(sec))
+        return f"{self._last_sec_str}.{int((created - sec) * 1000):03d}"
+
+    def format(self, record):
+        level_tag, counter, thread_name, cid, message = record
+
+        thread_tag = self._thread_tags.get(thread_name)
+        if thread_tag is None:
+            if len(self._thread_tags) >= _MAX_THREAD_TAGS:
+                self._thread_tags.clear()
+            thread_tag = f"[{thread_name}]"
+            self._thread_tags[thread_name] = thread_tag
+
+        timestamp = self._timestamp(counter)
+        if cid is not None:
+            return f"[{timestamp}] {thread_tag} {level_tag} [{cid}] {message}"
+        return f"[{timestamp}] {thread_tag} {level_tag} {message}"
+
+
+class _JsonLineFormatter(_LineFormatter):
+    """
+    Renders queued records as JSON lines: {"ts", "t" (thread), "l" (level), "m"},
+    plus "c" when a correlation id is set
+
+    Uses orjson when it is installed, stdlib json otherwise.
+    """
+
+    def format(self, record):
+        level_tag, counter, thread_name, cid, message = record
+        entry = {
+            "ts": self._timestamp(counter),
+            "t": thread_name,
+            "l": level_tag[1:-1],
+            "m": str(message),
+        }
+        if cid is not None:
+            entry["c"] = cid
+        if orjson is not None:
+            return orjson.dumps(entry).decode("utf-8")
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
 
 
 class RAGLogger:
     """
     Thread-safe logger with timestamps and file output
+
+    Calling threads only put a small tuple on a SimpleQueue (no Python-level
+    lock); a background writer thread drains it in batches, formats them and
+    does the console and file writes.
     """
 
-    def __init__(self, log_file="rag_scraper.log", verbose=True):
+    def __init__(self, log_file="rag_scraper.log", verbose=True, structured=False):
         """
         Initialize logger
 
         Args:
             log_file: Path to log file
             verbose: Whether to print to console
+            structured: Write JSON lines instead of "[ts] [thread] [level] msg" text
         """
         self.log_file = log_file
         self.verbose = verbose
+        self.structured = structured
         self.lock = threading.Lock()
+        self._fd = None  # raw O_APPEND descriptor, opened once below
+
+        formatter_cls = _JsonLineFormatter if structured else _LineFormatter
+        self._formatter = formatter_cls(
+            LOG_DATE_FORMAT, time.time() - time.perf_counter()
+        )
 
         # Ensure log file exists and append session start marker
         try:
             # Create directory if it doesn't exist
             log_dir = os.path.dirname(log_file)
-            if log_dir and not os.path.exists(log_dir):
+            if log_dir and log_dir not in _LOG_DIRS_ENSURED:
                 os.makedirs(log_dir, exist_ok=True)
+                _LOG_DIRS_ENSURED.add(log_dir)
 
-            # Append session start marker (not overwrite)
-            with open(self.log_file, "a", encoding="utf-8") as f:
-                f.write(
-                    f"\n=== RAG Scraper Log Session Started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n\n"
-                )
+            # Keep the file open for the whole session (append, not overwrite).
+            # Batches go straight to the kernel with os.write, so there is no
+            # Python-side buffer to flush or lose on a crash
+            self._fd = os.open(self.log_file, LOG_FILE_FLAGS, 0o644)
+            # The text banner would not parse as a JSON line
+            if not structured:
+                banner = SESSION_BANNER.format(time.strftime(LOG_DATE_FORMAT))
+                _write_all(self._fd, banner.encode("utf-8"))
         except Exception as e:
             print(f"Warning: Could not initialize log file: {e}")
 
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(
+            target=self._drain, name="RAGLoggerWriter", daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.close)
+        self._bind_level_methods()
+
+    def _bind_level_methods(self):
+        """
+        Bind info()/debug() straight to the outcome of the verbose check
+
+        The verbose flag is fixed for the logger's lifetime, so disabled levels
+        become no-ops and enabled ones skip the log() indirection.
+        """
+        emit = self._emit
+        info_tag = _LEVEL_TAGS["INFO"]
+        debug_tag = _LEVEL_TAGS["DEBUG"]
+        if self.verbose:
+            self.info = lambda message, force=False: emit(info_tag, message)
+            self.debug = lambda message: emit(debug_tag, message)
+        else:
+            self.info = lambda message, force=False: (
+                emit(info_tag, message) if force else None
+            )
+            self.debug = lambda message: None
+
+    def _drain(self):
+        """
+        Writer thread: block for one record, then take whatever else is queued
+
+        Lines are grouped into chunks of about LOG_BUFFER_SIZE; a backlog of up to
+        LOG_MAX_CHUNKS chunks goes to the file in a single writev() call. The GIL
+        is released during the syscall, so producers keep running meanwhile.
+        """
+        # Bound once: the loop below runs for every record
+        get = self._queue.get
+        get_nowait = self._queue.get_nowait
+        format_line = self._formatter.format
+        fd = self._fd  # only changes in close(), after this thread has exited
+        stopping = False
+        while not stopping:
+            record = get()
+            if record is _STOP:
+                break
+
+            chunks = []
+            lines = []
+            append = lines.append
+            size = 0
+            while True:
+                line = format_line(record)
+                append(line)
+                size += len(line) + 1
+                if size >= LOG_BUFFER_SIZE:
+                    # Trailing "" gives the final newline without a second copy
+                    append("")
+                    chunks.append("\n".join(lines))
+                    lines = []
+                    append = lines.append
+                    size = 0
+                    if len(chunks) >= LOG_MAX_CHUNKS:
+                        break
+                try:
+                    record = get_nowait()
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stopping = True
+                    break
+            if lines:
+                append("")
+                chunks.append("\n".join(lines))
+
+            # File first, so a slow or blocked terminal never holds back the log file
+            if fd is not None:
+                try:
+                    _write_chunks(fd, [chunk.encode("utf-8") for chunk in chunks])
+                except Exception as e:
+                    print(f"[Logger] [ERROR] Failed to write to log file: {e}")
+
+            try:
+                for chunk in chunks:
+                    sys.stdout.write(chunk)
+                sys.stdout.flush()
+            except (OSError, ValueError):
+                # Closed or broken stdout (e.g. piped into head) - keep logging to file
+                pass
+
+    def _emit(self, level_tag, message):
+        """
+        Queue one record for the writer thread
+
+        Only the raw fields are captured here; the timestamp string and the
+        line itself are built on the writer thread. Once the logger has been
+        closed nothing drains the queue, so the record is written right away.
+        """
+        record = (
+            level_tag,
+            time.perf_counter(),
+            threading.current_thread().name,
+            _correlation_id.get(),
+            message,
+        )
+        if self._writer is None:
+            self._write_now(record)
+            return
+        self._queue.put(record)
+        # close() may have stopped the writer and drained the queue between
+        # the check and the put; then nothing else would write this record
+        if self._writer is None:
+            self._write_leftovers()
+
+    def _write_leftovers(self):
+        """Write the records still queued once the writer thread has stopped"""
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if record is not _STOP:
+                self._write_now(record)
+
+    def _write_now(self, record):
+        """
+        Write one record on the calling thread, for a logger that is closed
+        (atexit, reset_logger) but still held by a module or thread
+        """
+        with self.lock:
+            line = self._formatter.format(record) + "\n"
+            if self.log_file:
+                try:
+                    fd = os.open(self.log_file, LOG_FILE_FLAGS, 0o644)
+                    try:
+                        _write_all(fd, line.encode("utf-8"))
+                    finally:
+                        os.close(fd)
+                except OSError as e:
+                    print(f"[Logger] [ERROR] Failed to write to log file: {e}")
+            try:
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            except (OSError, ValueError):
+                pass
+
     def log(self, message, force=False, level="INFO"):
         """
         Log a message with timestamp
@@ -51,28 +346,10 @@ class RAGLogger:
             force: Force print even if not verbose
             level: Log level (INFO, WARNING, ERROR, DEBUG)
         """
-        if not self.verbose and not force:
+        if not force and not self.verbose:
             return
 
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        thread_name = threading.current_thread().name
-
-        # Format: [timestamp] [thread] [level] message
-        log_line = f"[{timestamp}] [{thread_name}] [{level}] {message}"
-
-        with self.lock:
-            # Print to console
-            if self.verbose or force:
-                print(log_line)
-
-            # Write to file
-            try:
-                with open(self.log_file, "a", encoding="utf-8") as f:
-                    f.write(log_line + "\n")
-            except Exception as e:
-                print(
-                    f"[{timestamp}] [Logger] [ERROR] Failed to write to log file: {e}"
-                )
+        self._emit(_LEVEL_TAGS.get(level) or f"[{level}]", message)
 
     def info(self, message, force=False):
         """Log info message"""
@@ -90,33 +367,80 @@ class RAGLogger:
         """Log debug message"""
         self.log(message, force=False, level="DEBUG")
 
+    def close(self):
+        """Drain queued messages, then flush and close the log file (idempotent)"""
+        with self.lock:
+            if self._writer is not None:
+                self._queue.put(_STOP)
+                self._writer.join()
+                self._writer = None
+        # Records queued while the writer was stopping; later ones are written
+        # directly by _emit
+        self._write_leftovers()
+        with self.lock:
+            if self._fd is not None:
+                try:
+                    os.close(self._fd)
+                except OSError:
+                    pass
+                self._fd = None
+        atexit.unregister(self.close)
+
 
 # Global logger instance
 _global_logger = None
 _logger_lock = threading.Lock()
 
 
-def get_logger(log_file="rag_scraper.log", verbose=True):
+def get_logger(log_file="rag_scraper.log", verbose=True, structured=False):
     """
     Get or create global logger instance
 
     Args:
         log_file: Path to log file
         verbose: Whether to print to console
+        structured: Write JSON lines (only used when the logger is created)
 
     Returns:
         RAGLogger instance
     """
     global _global_logger
 
+    # Fast path: after the first call this is a plain global read, no lock
+    logger = _global_logger
+    if logger is not None:
+        return logger
+
     with _logger_lock:
         if _global_logger is None:
-            _global_logger = RAGLogger(log_file=log_file, verbose=verbose)
+            _global_logger = RAGLogger(
+                log_file=log_file, verbose=verbose, structured=structured
+            )
         return _global_logger
 
 
+@contextmanager
+def correlation_id(cid):
+    """
+    Tag every log line written inside the block with cid
+
+    Context variables do not carry over into new threads, so set this inside
+    the worker function of a thread pool task.
+
+    Args:
+        cid: Correlation id such as a course code
+    """
+    token = _correlation_id.set(str(cid))
+    try:
+        yield
+    finally:
+        _correlation_id.reset(token)
+
+
 def reset_logger():
     """Reset global logger (useful for testing)"""
     global _global_logger
     with _logger_lock:
+        if _global_logger is not None:
+            _global_logger.close()
         _global_logger = None
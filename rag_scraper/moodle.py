@@ -6,19 +6,375 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import json
+import re
+import asyncio
 import time
 import os
+import queue
+import atexit
 import argparse
+import shutil
+import threading
+import base64
+import binascii
+import random
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlparse, parse_qs, urljoin, unquote
+
+try:
+    import lxml  # noqa: F401
+
+    HTML_PARSER = "lxml"
+except ImportError:  # optional, BeautifulSoup's pure-Python parser is used instead
+    HTML_PARSER = "html.parser"
+
+try:
+    import aiohttp
+except ImportError:  # optional, NLP files use the download thread pool instead
+    aiohttp = None
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:  # optional, BeautifulSoup is used instead
+    HTMLParser = None
 
 try:
     from .logger import get_logger
+    from .utils import sanitize_filename, write_private_json
 except ImportError:
     from logger import get_logger
+    from utils import sanitize_filename, write_private_json
 
 CONNECT_TIME_OUT = 5  # seconds
+POLL_FREQUENCY = 0.1  # seconds between WebDriverWait condition checks
+
+# Moodle session cookies are cached per user so a later run can skip the login
+COOKIE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "kengu")
+COOKIE_MAX_AGE = 12 * 60 * 60  # seconds
+
+# Closed scrapers hand their Chrome to the next scraper instead of quitting it
+DRIVER_POOL_SIZE = 2  # idle browsers kept per headless/headed mode
+DRIVER_IDLE_TIMEOUT = 5 * 60  # seconds before an idle pooled browser is quit
+DRIVER_REAP_INTERVAL = 60  # seconds between checks for such browsers
+
+MOODLE_URL = "https://moodle.hku.hk"
+CAS_LOGIN_URL = f"{MOODLE_URL}/login/index.php?authCAS=CAS"
+
+# Plain-HTTP login walks the CAS -> HKU Portal -> ADFS/Azure AD form chain
+HTTP_LOGIN_MAX_STEPS = 12  # form submissions before giving up
+# Forms are only submitted to these hosts; anything else is left to Selenium
+LOGIN_FORM_HOSTS = frozenset(
+    {
+        "moodle.hku.hk",
+        "hkuportal.hku.hk",
+        "adfs.hku.hk",
+        "adfs.connect.hku.hk",
+        "login.microsoftonline.com",
+    }
+)
+# Credentials only go into these fields (HKU Portal, ADFS, Azure AD)
+LOGIN_USERNAME_FIELDS = frozenset({"email", "username", "UserName", "loginfmt"})
+LOGIN_PASSWORD_FIELDS = frozenset({"password", "Password", "passwd"})
+BROWSER_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+# Moodle Web Services: the mobile-app service is enabled for students, and its
+# launch endpoint hands a logged-in (CAS) session a token without a password
+WS_ENDPOINT = f"{MOODLE_URL}/webservice/rest/server.php"
+WS_LAUNCH_URL = f"{MOODLE_URL}/admin/tool/mobile/launch.php"
+WS_SERVICE = "moodle_mobile_app"
+
+# Valid file extensions for knowledge base
+VALID_EXTENSIONS = frozenset({".pdf", ".doc", ".docx", ".ppt", ".pptx", ".txt", ".md"})
+VALID_SUFFIXES = tuple(VALID_EXTENSIONS)  # the same, for one str.endswith() call
+IMAGE_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg"})
+ARCHIVE_EXTENSIONS = frozenset({".zip", ".rar", ".7z", ".gz", ".tar"})
+BLOCKED_EXTENSIONS = IMAGE_EXTENSIONS | ARCHIVE_EXTENSIONS
+
+# Document links on the NLP course site (extension at the end of the path)
+NLP_DOC_EXT_RE = re.compile(r"\.(pdf|pptx?|docx?)(?:$|[?#])", re.I)
+
+# Course page links and the course ID in their query string
+COURSE_VIEW_HREF_RE = re.compile(r"course/view\.php")
+COURSE_ID_RE = re.compile(r"id=(\d+)")
+
+# Course link texts that are navigation, not course names
+EXCLUDED_COURSE_TEXTS = frozenset(
+    {
+        "Click to enter this course",
+        "Course",
+        "View",
+        "Go to course",
+        "Enter course",
+    }
+)
+
+# Partial parses: keep only the <a> tags a page is scanned for
+LINK_STRAINER = SoupStrainer("a", href=True)
+COURSE_LINK_STRAINER = SoupStrainer(
+    "a", href=lambda href: bool(href) and "course/view.php" in href
+)
+
+# (text, absolute href) of every course link, read from the live DOM in one call.
+# Text nodes are trimmed and joined with spaces like get_text(" ", strip=True)
+COURSE_LINKS_SCRIPT = """
+return Array.from(document.querySelectorAll('a[href*="course/view.php"]'), a => {
+    const parts = [];
+    const walker = document.createTreeWalker(a, NodeFilter.SHOW_TEXT);
+    while (walker.nextNode()) {
+        const text = walker.currentNode.nodeValue.trim();
+        if (text) parts.push(text);
+    }
+    return [parts.join(" "), a.href];
+});
+"""
+
+# Sub-resources the scraper never needs; blocked via Chrome DevTools Protocol
+BLOCKED_URL_PATTERNS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.svg",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.css",
+    "*.mp4",
+]
+
+# Per-resource-page ETag/Last-Modified and file list, kept in the knowledge base
+PAGE_CACHE_FILE = ".moodle_cache.json"
+
+# Only these links on a course page can lead to files
+COURSE_FILE_LINK_SELECTOR = (
+    'a[href*="/pluginfile.php"], '
+    'a[href*="/mod/resource/view.php"], '
+    'a[href*="/mod/folder/view.php"]'
+)
+PLUGINFILE_LINK_SELECTOR = 'a[href*="/pluginfile.php"]'
+# A course page is ready to scrape once a file link or the main region exists
+COURSE_PAGE_READY_SELECTOR = f"{COURSE_FILE_LINK_SELECTOR}, #region-main"
+
+# extract_courses selectors: course links, then the fallback page structures
+COURSE_LINK_SELECTOR = 'a[href*="course/view.php"]'
+COURSE_CARD_SELECTOR = "div.card-deck div.card, div.coursebox"
+COURSE_CARD_TITLE_SELECTOR = "h3.card-title a"
+COURSE_BOX_NAME_SELECTOR = ".coursename a"
+COURSE_CONTAINER_SELECTOR = (
+    ".course-listitem, div[data-region='course-item'], "
+    ".course-info-container, .coursebox"
+)
+MAIN_REGION_SELECTOR = "#region-main, .content, main"
+
+# Resource/folder pages fetched concurrently when scraping a course page
+RESOURCE_PROBE_WORKERS = 20
+RESOURCE_PROBE_JITTER = 0.1  # seconds, random delay before each probe
+
+DOWNLOAD_WORKERS = 8  # concurrent file downloads per course
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB copied from socket to file per read
+PARTIAL_SUFFIX = ".partial"  # downloads in progress; renamed into place when complete
+# Per-course-folder sidecar: filename -> ETag of each file downloaded into it
+ETAG_FILE = ".rag_etags.json"
+
+# Keep-alive connections per host in the shared HTTP session; covers the
+# resource probe and download thread pools. Requests beyond it wait for a free
+# connection (pool_block) instead of opening throwaway ones
+HTTP_POOL_SIZE = 32
+
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+# Daemon thread quitting browsers idle for DRIVER_IDLE_TIMEOUT (see _start_reaper)
+_reaper = None
+_reaper_lock = threading.Lock()
+
+# headless flag -> (WebDriver, time.monotonic() it was released) of idle
+# browsers with cookies, cache and storage cleared, ready for reuse
+_idle_drivers = {
+    True: queue.Queue(maxsize=DRIVER_POOL_SIZE),
+    False: queue.Queue(maxsize=DRIVER_POOL_SIZE),
+}
+
+
+def _get_chromedriver_path():
+    """Resolve chromedriver once per process (ChromeDriverManager checks online)"""
+    global _chromedriver_path
+    if _chromedriver_path is None:
+        with _chromedriver_lock:
+            if _chromedriver_path is None:
+                _chromedriver_path = ChromeDriverManager().install()
+    return _chromedriver_path
+
+
+class _ExistingFiles:
+    """
+    Set-like view of the downloaded files in a course directory, by
+    lowercased name (supports `in` and add())
+
+    Built from one os.scandir() pass. An entry is only stat()ed when its name
+    is looked up: empty files (left by a crash before downloads were written
+    via a .partial file) do not count, so they are downloaded again.
+    """
+
+    def __init__(self, course_dir):
+        with os.scandir(course_dir) as entries:
+            self._entries = {e.name.lower(): e for e in entries}
+        self._present = set()  # names confirmed on disk or added this run
+
+    def __contains__(self, name_lower):
+        if name_lower in self._present:
+            return True
+        entry = self._entries.get(name_lower)
+        if entry is None:
+            return False
+        try:
+            present = entry.is_file() and entry.stat().st_size > 0
+        except OSError:
+            present = False
+        if present:
+            self._present.add(name_lower)
+        return present
+
+    def add(self, name_lower):
+        self._present.add(name_lower)
+
+
+def _existing_files(course_dir):
+    """Downloaded files in a course directory, see _ExistingFiles"""
+    return _ExistingFiles(course_dir)
+
+
+def _load_etags(course_dir):
+    """ETags recorded for a course folder's downloads (empty if none)"""
+    try:
+        with open(os.path.join(course_dir, ETAG_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_etags(course_dir, etags):
+    """Write a course folder's ETag sidecar atomically (temp file + os.replace)"""
+    etag_path = os.path.join(course_dir, ETAG_FILE)
+    tmp_path = f"{etag_path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(etags, f, ensure_ascii=False)
+        os.replace(tmp_path, etag_path)
+    except OSError:
+        pass
+
+
+def _remove_partial(partial_path):
+    """Delete a failed download's .partial file, if one was created"""
+    try:
+        os.remove(partial_path)
+    except OSError:
+        pass
+
+
+def _filename_from_url(url):
+    """Decoded last path segment of a URL (query and fragment dropped)"""
+    return unquote(os.path.basename(urlparse(url).path))
+
+
+def _node_text(node):
+    """selectolax counterpart of BeautifulSoup's get_text(separator=" ", strip=True)"""
+    # strip=True also yields empty parts for whitespace-only text nodes
+    parts = node.text(separator="\x00", strip=True).split("\x00")
+    return " ".join(part for part in parts if part)
+
+
+def _select_links(html, selector, strainer):
+    """
+    (text, href) pairs of the links matching a CSS selector
+
+    Uses selectolax's C parser when installed, otherwise a BeautifulSoup parse
+    limited by strainer.
+    """
+    if HTMLParser is not None:
+        return [
+            (_node_text(node), node.attributes.get("href") or "")
+            for node in HTMLParser(html).css(selector)
+        ]
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=strainer)
+    return [
+        (link.get_text(separator=" ", strip=True), link.get("href", ""))
+        for link in soup.select(selector)
+    ]
+
+
+def _in_event_loop():
+    """Whether this thread is already running an asyncio event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _quit_driver(driver):
+    """Quit a browser, ignoring one that has already gone away"""
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def _reap_idle_drivers(max_idle=DRIVER_IDLE_TIMEOUT):
+    """Quit the pooled browsers that have been idle for max_idle seconds"""
+    now = time.monotonic()
+    for pool in _idle_drivers.values():
+        keep = []
+        while True:
+            try:
+                driver, released = pool.get_nowait()
+            except queue.Empty:
+                break
+            if now - released >= max_idle:
+                _quit_driver(driver)
+            else:
+                keep.append((driver, released))
+        for driver, released in keep:
+            try:
+                pool.put_nowait((driver, released))
+            except queue.Full:
+                _quit_driver(driver)
+
+
+def _reap_periodically():
+    """Reaper thread body: quit idle pooled browsers every DRIVER_REAP_INTERVAL"""
+    while True:
+        time.sleep(DRIVER_REAP_INTERVAL)
+        _reap_idle_drivers()
+
+
+def _start_reaper():
+    """Start the single reaper thread, on the first browser put in the pool"""
+    global _reaper
+    if _reaper is not None:
+        return
+    with _reaper_lock:
+        if _reaper is None:
+            _reaper = threading.Thread(
+                target=_reap_periodically, name="DriverPoolReaper", daemon=True
+            )
+            _reaper.start()
+
+
+@atexit.register
+def shutdown_driver_pool():
+    """Quit every pooled browser; also runs when the process exits"""
+    _reap_idle_drivers(max_idle=0)
+
 
 class HKUMoodleScraper:
     def __init__(self, headless=True, verbose=False):
@@ -34,12 +390,37 @@ class HKUMoodleScraper:
         self.logger = get_logger(log_file="rag_scraper.log", verbose=verbose)
         self.course_urls = {}  # Initialize course URLs dictionary
         self.courses = []
+        self.token = None  # Web Services token; False once known to be unavailable
+        self.cookie_file = None  # set per user by connect_moodle()
+        self._page_cache = {}  # resource page URL -> {"etag", "last_modified", "links"}
+        self._cache_path = None
+
+        # One keep-alive session for every plain HTTP request (Web Services,
+        # resource probes, downloads), so TLS connections are reused
+        self._http = requests.Session()
+        self._http.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                pool_block=True,
+                max_retries=Retry(total=3, backoff_factor=0.3),
+            ),
+        )
+        self._http.headers["User-Agent"] = BROWSER_USER_AGENT
+        self._cookie_lock = threading.Lock()
 
         # Initialize browser
         self._initialize_driver()
 
     def _initialize_driver(self):
         """Initialize or reinitialize the Chrome WebDriver"""
+        # Reuse a browser released by an earlier scraper when one is idle
+        self.driver = self._take_pooled_driver()
+        if self.driver is not None:
+            self._log("Reusing pooled browser")
+            return
+
         # Setup Chrome options
         chrome_options = Options()
         if self.headless:
@@ -52,43 +433,391 @@ class HKUMoodleScraper:
         chrome_options.add_experimental_option("useAutomationExtension", False)
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-images")
+        # Images and stylesheets are skipped; JavaScript stays on (the login
+        # pages and Moodle's course listing need it)
         chrome_options.add_argument("--blink-settings=imagesEnabled=false")
-        chrome_options.add_argument("--disable-css")
         chrome_options.add_experimental_option(
             "prefs", {"profile.default_content_setting_values.stylesheets": 2}
         )
-        chrome_options.add_argument("--fast")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-plugins")
-        chrome_options.add_argument("--disable-plugin-types=all")
         chrome_options.add_argument("--disable-http2")
-        chrome_options.add_argument("--disable-prefetching")
-        chrome_options.add_argument("--disable-preconnect")
-        chrome_options.add_argument("--disable-javascript")
         chrome_options.add_argument("--disable-dom-distiller")
 
         # Initialize WebDriver
         self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()), options=chrome_options
+            service=Service(_get_chromedriver_path()), options=chrome_options
         )
         self.driver.execute_script(
             "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
         )
+        # Only explicit WebDriverWaits gate on elements
+        self.driver.implicitly_wait(0)
+        self._block_resources()
+
+    def _block_resources(self):
+        """
+        Block images, fonts, stylesheets and media at the network layer, and
+        deny browser-side downloads (files are fetched with requests instead)
+        """
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd(
+                "Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS}
+            )
+            self.driver.execute_cdp_cmd(
+                "Page.setDownloadBehavior", {"behavior": "deny"}
+            )
+        except WebDriverException as e:
+            self._log(f"Could not enable request blocking: {e}")
+
+    def _take_pooled_driver(self):
+        """
+        Take an idle pooled browser of the same mode, skipping dead ones
+
+        Returns:
+            WebDriver or None if none is available
+        """
+        pool = _idle_drivers[bool(self.headless)]
+        while True:
+            try:
+                driver, released = pool.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - released >= DRIVER_IDLE_TIMEOUT:
+                _quit_driver(driver)
+                continue
+            try:
+                driver.current_url  # raises if the browser has gone away
+                return driver
+            except WebDriverException:
+                _quit_driver(driver)
+
+    def _release_driver(self):
+        """
+        Return the browser to the pool with its cookies, cache and storage
+        cleared, or quit it if the pool is full or the browser cannot be reset.
+        Pooled browsers are quit after DRIVER_IDLE_TIMEOUT seconds unused
+
+        Returns:
+            bool: True if pooled, False if the browser was quit
+        """
+        driver = self.driver
+        try:
+            # All domains, including the CAS / Azure AD login sessions
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            # localStorage, IndexedDB, service workers, ... of every origin
+            driver.execute_cdp_cmd(
+                "Storage.clearDataForOrigin", {"origin": "*", "storageTypes": "all"}
+            )
+            driver.get("about:blank")
+            _idle_drivers[bool(self.headless)].put_nowait((driver, time.monotonic()))
+        except (queue.Full, WebDriverException):
+            _quit_driver(driver)
+            return False
+
+        _start_reaper()
+        return True
 
     def _log(self, message):
         """Print message only if verbose mode is enabled"""
         if self.verbose:
             self.logger.info(message)
 
+    def _sync_cookies_from_selenium(self):
+        """
+        Copy the browser's Moodle cookies into the shared HTTP session
+
+        Called after login, and again when a request is rejected with 401/403
+        (expired session). May run on a worker thread, so WebDriver access is
+        serialized.
+        """
+        with self._cookie_lock:
+            for cookie in self.driver.get_cookies():
+                self._http.cookies.set(
+                    cookie["name"],
+                    cookie["value"],
+                    domain=cookie.get("domain", ""),
+                    path=cookie.get("path", "/"),
+                )
+
+    def _load_cookies(self):
+        """
+        Load cached Moodle cookies from a previous successful login
+
+        Returns:
+            list: Cookie dicts, empty if the cache is missing or stale
+        """
+        try:
+            with open(self.cookie_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return []
+
+        if time.time() - cached.get("saved_at", 0) > COOKIE_MAX_AGE:
+            return []
+
+        now = time.time()
+        return [
+            c for c in cached.get("cookies", []) if (c.get("expiry") or now + 1) > now
+        ]
+
+    def _save_cookies(self):
+        """Persist the HTTP session's Moodle cookies for the next run"""
+        cookies = [
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "expiry": cookie.expires,
+            }
+            for cookie in self._http.cookies
+            if cookie.domain.lstrip(".").endswith("moodle.hku.hk")
+        ]
+        try:
+            write_private_json(
+                self.cookie_file, {"saved_at": time.time(), "cookies": cookies}
+            )
+        except OSError as e:
+            self._log(f"Could not cache cookies: {e}")
+
+    def _restore_session(self):
+        """
+        Log in with the cached cookies if the Moodle session is still valid
+
+        Returns:
+            bool: True if Moodle accepted the cached session
+        """
+        cookies = self._load_cookies()
+        if not cookies:
+            return False
+
+        for cookie in cookies:
+            self._http.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+            )
+        try:
+            # Redirects are not followed: an expired session is sent through the
+            # login page to the CAS/ADFS hosts, whose pages also answer 200
+            response = self._http.get(
+                f"{MOODLE_URL}/my/courses.php",
+                timeout=CONNECT_TIME_OUT,
+                allow_redirects=False,
+            )
+            response.close()
+            if response.status_code == 200:
+                self._sync_cookies_to_selenium()
+                return True
+        except (requests.RequestException, WebDriverException) as e:
+            self._log(f"Cached session check failed: {e}")
+
+        self._log("Cached Moodle session expired, logging in again...")
+        self._http.cookies.clear()
+        return False
+
+    def _next_login_form(self, response, username, password):
+        """
+        Work out the next submission of the CAS login chain from a response
+
+        Handles the Azure AD "Stay signed in?" page (rendered from its $Config
+        JSON, answered with LoginOptions=1) and plain HTML forms (email and
+        password pages, auto-posting SAML/WS-Fed forms). Credentials are only
+        filled into the known LOGIN_USERNAME_FIELDS/LOGIN_PASSWORD_FIELDS.
+
+        Args:
+            response: Last requests.Response of the chain
+            username (str): HKU email address
+            password (str): Password
+
+        Returns:
+            tuple: (method, url, fields, has_password), or None if the page has
+                nothing to submit or asks for a field this walk does not know
+        """
+        config_match = re.search(r"\$Config=(\{.*?\});\s*$", response.text, re.M)
+        if config_match:
+            config = json.loads(config_match.group(1))
+            url_post = config.get("urlPost", "")
+            if "kmsi" in url_post.lower():
+                fields = {
+                    "LoginOptions": "1",
+                    "type": "28",
+                    "ctx": config.get("sCtx", ""),
+                    "flowToken": config.get("sFT", ""),
+                    "canary": config.get("canary", ""),
+                }
+                return "post", urljoin(response.url, url_post), fields, False
+
+        soup = BeautifulSoup(response.text, HTML_PARSER)
+        form = soup.find("form")
+        if form is None:
+            return None
+
+        fields = {}
+        has_password = False
+        for field in form.find_all("input"):
+            name = field.get("name")
+            if not name:
+                continue
+            field_type = (field.get("type") or "text").lower()
+            value = field.get("value", "")
+            if name in LOGIN_PASSWORD_FIELDS:
+                value = password
+                has_password = True
+            elif field_type == "password":
+                # Unknown password prompt (MFA, PIN, ...): leave it to the browser
+                return None
+            elif name in LOGIN_USERNAME_FIELDS and not value:
+                value = username
+            elif field_type in ("submit", "button", "checkbox"):
+                continue
+            fields[name] = value
+
+        method = (form.get("method") or "get").lower()
+        action = urljoin(response.url, form.get("action") or response.url)
+        return method, action, fields, has_password
+
+    def _connect_moodle_http(self, username, password):
+        """
+        Log in to Moodle through CAS with plain HTTP requests (no browser)
+
+        Submits each form of the login chain with the shared session until it
+        lands on Moodle, then copies the Moodle cookies into the browser so the
+        page-scraping fallbacks keep working.
+
+        Args:
+            username (str): HKU email address
+            password (str): Password
+
+        Returns:
+            bool: True if logged in; False if the chain was not recognised or
+                the credentials were rejected
+        """
+        response = self._http.get(CAS_LOGIN_URL, timeout=CONNECT_TIME_OUT)
+        password_posts = 0
+        for _ in range(HTTP_LOGIN_MAX_STEPS):
+            current = urlparse(response.url)
+            if current.hostname == "moodle.hku.hk" and "login" not in current.path:
+                self._sync_cookies_to_selenium()
+                return True
+
+            next_form = self._next_login_form(response, username, password)
+            if next_form is None:
+                self._log(f"HTTP login stopped at {response.url}")
+                return False
+
+            method, action, fields, has_password = next_form
+            target = urlparse(action)
+            if target.scheme != "https" or target.hostname not in LOGIN_FORM_HOSTS:
+                self._log(f"HTTP login stopped: form posts to {target.hostname}")
+                return False
+            if has_password:
+                password_posts += 1
+                if password_posts > 1:
+                    # Password page shown again: credentials rejected
+                    return False
+
+            self._log(f"HTTP login: submitting form to {target.hostname}")
+            if method == "post":
+                response = self._http.post(
+                    action, data=fields, timeout=CONNECT_TIME_OUT
+                )
+            else:
+                response = self._http.get(
+                    action, params=fields, timeout=CONNECT_TIME_OUT
+                )
+
+        return False
+
+    def _sync_cookies_to_selenium(self):
+        """Copy the HTTP session's Moodle cookies into the browser"""
+        with self._cookie_lock:
+            # Cookies can only be added for the domain currently loaded
+            self.driver.get(MOODLE_URL)
+            for cookie in self._http.cookies:
+                if cookie.domain.lstrip(".").endswith("moodle.hku.hk"):
+                    self.driver.add_cookie(
+                        {
+                            "name": cookie.name,
+                            "value": cookie.value,
+                            "path": cookie.path,
+                        }
+                    )
+
+    def _wait_after_click(self, element, previous_url):
+        """
+        Wait until a click has moved the login flow on: the URL changed or the
+        clicked element was detached (Azure AD swaps views in place)
+
+        Args:
+            element: WebElement that was clicked
+            previous_url (str): URL before the click
+        """
+        detached = EC.staleness_of(element)
+        try:
+            WebDriverWait(
+                self.driver, CONNECT_TIME_OUT, poll_frequency=POLL_FREQUENCY
+            ).until(lambda d: d.current_url != previous_url or detached(d))
+        except TimeoutException:
+            self._log("No navigation detected after click, continuing...")
+
+    def _open_course_page(self, course_url):
+        """
+        Navigate to a course page and wait until its content is in the DOM
+
+        Returns as soon as a file link or the main region appears instead of
+        sleeping a fixed time; a page without either is scraped as it is.
+
+        Args:
+            course_url (str): Course URL
+        """
+        self.driver.get(course_url)
+        try:
+            WebDriverWait(
+                self.driver, CONNECT_TIME_OUT, poll_frequency=POLL_FREQUENCY
+            ).until(
+                EC.presence_of_element_located(
+                    (By.CSS_SELECTOR, COURSE_PAGE_READY_SELECTOR)
+                )
+            )
+        except TimeoutException:
+            self._log("Course page content not found, scraping it as loaded...")
+
     def connect_moodle(self, username, password):
         """Login to HKU Moodle using Selenium and retrieve courses with retry logic"""
         if "@" not in username or "hku" not in username:
             self.logger.error("Error: Please enter a valid HKU email address.")
             return 0
 
+        self.cookie_file = os.path.join(
+            COOKIE_CACHE_DIR, f"moodle_cookies_{username}.json"
+        )
+        login_start_time = time.time()
+
+        # Moodle sessions last hours: reuse the last run's if it is still valid
+        if self._restore_session():
+            login_duration = time.time() - login_start_time
+            self.logger.info(
+                f"✅ Reused cached Moodle session in {login_duration:.2f}s", force=True
+            )
+            return login_duration
+
+        # Fast path: the CAS chain is plain HTML forms, so try it without the
+        # browser first; Selenium below stays as the fallback
+        try:
+            if self._connect_moodle_http(username, password):
+                self._save_cookies()
+                login_duration = time.time() - login_start_time
+                self.logger.info(
+                    f"✅ Login successful in {login_duration:.2f}s", force=True
+                )
+                return login_duration
+            self._log("HTTP login did not reach Moodle, using the browser...")
+        except (requests.RequestException, ValueError, WebDriverException) as e:
+            self._log(f"HTTP login failed ({e}), using the browser...")
+
         max_retries = 3
         for attempt in range(1, max_retries + 1):
             login_start_time = time.time()
@@ -115,10 +844,9 @@ class HKUMoodleScraper:
                 self._log("Accessing CAS login page directly...")
                 self.driver.set_page_load_timeout(CONNECT_TIME_OUT)
                 try:
-                    self.driver.get("https://moodle.hku.hk/login/index.php?authCAS=CAS")
+                    self.driver.get(CAS_LOGIN_URL)
                 except TimeoutException:
                     raise TimeoutException("Page load timeout: CAS login page")
-                time.sleep(1)
 
                 # Step 2: Enter email on HKU Portal login page with timeout
                 self._log("Entering email on HKU Portal page...")
@@ -129,14 +857,12 @@ class HKUMoodleScraper:
                     email_input.clear()
                     email_input.send_keys(username)
                     self._log(f"Entered email: {username}")
-                    time.sleep(0.5)
 
                     login_button = WebDriverWait(self.driver, CONNECT_TIME_OUT).until(
                         EC.element_to_be_clickable((By.ID, "login_btn"))
                     )
                     login_button.click()
                     self._log("Clicked LOG IN button, waiting for password page...")
-                    time.sleep(1)
                 except TimeoutException as e:
                     raise TimeoutException(f"Timeout during email entry: {e}")
 
@@ -149,14 +875,14 @@ class HKUMoodleScraper:
                     password_input.clear()
                     password_input.send_keys(password)
                     self._log("Password entered")
-                    time.sleep(0.5)
 
                     submit_button = WebDriverWait(self.driver, CONNECT_TIME_OUT).until(
                         EC.element_to_be_clickable((By.ID, "submitButton"))
                     )
+                    previous_url = self.driver.current_url
                     submit_button.click()
                     self._log("Clicked login button, waiting for login completion...")
-                    time.sleep(1)
+                    self._wait_after_click(submit_button, previous_url)
                 except TimeoutException as e:
                     raise TimeoutException(f"Timeout during password entry: {e}")
 
@@ -169,9 +895,10 @@ class HKUMoodleScraper:
                     self._log(
                         "Found 'Stay signed in' page, clicking 'Continue' button..."
                     )
+                    previous_url = self.driver.current_url
                     continue_button.click()
                     self._log("Clicked 'Continue' button, waiting for next step...")
-                    time.sleep(1)
+                    self._wait_after_click(continue_button, previous_url)
                 except TimeoutException:
                     self._log("No 'Stay signed in' page found or click failed")
 
@@ -201,27 +928,22 @@ class HKUMoodleScraper:
                         self._log(
                             "Clicked 'Yes' button, waiting for redirect to Moodle..."
                         )
-                        time.sleep(1)
                 except Exception as e:
                     self._log(f"Failed to handle 'Stay signed in?' dialog: {e}")
 
                 # Step 6: Wait and confirm redirect to Moodle with timeout
                 self._log("Waiting for redirect to Moodle...")
                 max_wait = 5
-                wait_count = 0
-                while wait_count < max_wait:
-                    current_url = self.driver.current_url
-                    self._log(f"Current URL ({wait_count}s): {current_url}")
-                    if (
-                        "moodle.hku.hk" in current_url
-                        and "login" not in current_url.lower()
-                    ):
-                        self._log("Successfully logged in to Moodle!")
-                        break
-                    time.sleep(1)
-                    wait_count += 1
-
-                if wait_count >= max_wait:
+                try:
+                    WebDriverWait(
+                        self.driver, max_wait, poll_frequency=POLL_FREQUENCY
+                    ).until(
+                        lambda d: "moodle.hku.hk" in d.current_url
+                        and "login" not in d.current_url.lower()
+                    )
+                    self._log("Successfully logged in to Moodle!")
+                except TimeoutException:
+                    self._log(f"Current URL: {self.driver.current_url}")
                     raise TimeoutException(
                         "Timeout: Failed to redirect to Moodle after login"
                     )
@@ -237,6 +959,8 @@ class HKUMoodleScraper:
                 # Calculate and return login time
                 login_end_time = time.time()
                 login_duration = login_end_time - login_start_time
+                self._sync_cookies_from_selenium()
+                self._save_cookies()
                 self.logger.info(
                     f"✅ Login successful in {login_duration:.2f}s", force=True
                 )
@@ -259,52 +983,172 @@ class HKUMoodleScraper:
 
         return 0
 
+    def _get_ws_token(self):
+        """
+        Get a Moodle Web Services token for the logged-in browser session
+
+        CAS users have no Moodle password, so the token comes from the mobile
+        app launch endpoint, which redirects an authenticated session to
+        moodlemobile://token=<base64 "signature:::token">.
+
+        Returns:
+            str: Token, or None if Web Services are unavailable
+        """
+        if self.token is not None:
+            return self.token or None
+
+        self.token = False
+        try:
+            response = self._http.get(
+                WS_LAUNCH_URL,
+                params={
+                    "service": WS_SERVICE,
+                    "passport": random.randint(1, 10**9),
+                    "urlscheme": "moodlemobile",
+                },
+                allow_redirects=False,
+                timeout=CONNECT_TIME_OUT,
+            )
+            location = response.headers.get("Location", "")
+            if not location.startswith("moodlemobile://token="):
+                self._log("Web Services token not available, using page scraping")
+                return None
+
+            encoded = location.split("token=", 1)[1]
+            parts = base64.b64decode(encoded).decode("utf-8").split(":::")
+            if len(parts) < 2 or not parts[1]:
+                return None
+
+            self.token = parts[1]
+            self._log("✅ Got Moodle Web Services token")
+            return self.token
+        except (requests.RequestException, binascii.Error, UnicodeDecodeError) as e:
+            self._log(f"Could not get Web Services token: {e}")
+            return None
+
+    def _ws_call(self, function, **params):
+        """
+        Call a Moodle Web Services function
+
+        Args:
+            function (str): Web Services function name
+            **params: Function parameters
+
+        Returns:
+            Decoded JSON response
+
+        Raises:
+            RuntimeError: If Moodle returns an exception payload
+        """
+        data = {
+            "wstoken": self.token,
+            "wsfunction": function,
+            "moodlewsrestformat": "json",
+        }
+        data.update(params)
+        response = self._http.post(WS_ENDPOINT, data=data, timeout=30)
+        response.raise_for_status()
+        result = response.json()
+        if isinstance(result, dict) and "exception" in result:
+            raise RuntimeError(f"{function}: {result.get('message', result)}")
+        return result
+
+    def _get_courses_ws(self):
+        """
+        List enrolled courses with core_enrol_get_users_courses
+
+        Returns:
+            tuple: (courses, course_urls) in the same shapes as the page scraping
+        """
+        user_id = self._ws_call("core_webservice_get_site_info")["userid"]
+        enrolled = self._ws_call("core_enrol_get_users_courses", userid=user_id)
+
+        courses = []
+        course_urls = {}
+        for course in enrolled:
+            course_name = course.get("fullname", "").strip()
+            course_id = course.get("id")
+            if not course_name or not course_id:
+                continue
+            courses.append({"course_name": course_name, "course_id": course_id})
+            course_urls.setdefault(
+                course_name, f"{MOODLE_URL}/course/view.php?id={course_id}"
+            )
+        return courses, course_urls
+
+    @staticmethod
+    def _course_links_settled():
+        """
+        WebDriverWait condition: document loaded and the course link count is
+        non-zero and unchanged since the previous poll
+
+        Returns:
+            callable: Condition taking the driver
+        """
+        last_count = [None]
+
+        def settled(driver):
+            count = driver.execute_script(
+                "return document.readyState === 'complete'"
+                " ? document.querySelectorAll('a[href*=\"course/view.php\"]').length"
+                " : -1"
+            )
+            stable = count > 0 and count == last_count[0]
+            last_count[0] = count
+            return stable
+
+        return settled
+
     def get_courses(self):
+        start_time = time.time()
+
+        # Web Services give the course list as JSON, without rendering my/courses
+        if self._get_ws_token():
+            try:
+                courses, course_urls = self._get_courses_ws()
+                if courses:
+                    self.courses = courses
+                    self.course_urls = course_urls
+                    self._log(f"Found {len(courses)} courses via Web Services")
+                    return courses, time.time() - start_time
+            except (requests.RequestException, ValueError, KeyError, RuntimeError) as e:
+                self._log(f"Web Services course list failed, scraping page: {e}")
+
         # Step 6: Access my courses page
         self.logger.info("Checking your courses page...", force=True)
-        start_time = time.time()
         self.driver.get("https://moodle.hku.hk/my/courses.php")
 
         # Wait for courses to be loaded via JavaScript
         self._log("Waiting for course content to load via JavaScript...")
         try:
-            # Wait for course links to appear (max 20 seconds)
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, 'a[href*="course/view.php"]')
-                )
+            # Wait (max 20 seconds) until the page has finished loading and the
+            # number of course links is stable across two polls
+            WebDriverWait(self.driver, 20, poll_frequency=POLL_FREQUENCY).until(
+                self._course_links_settled()
             )
             self._log("Course content loaded successfully")
-            time.sleep(1)  # Extra wait to ensure all courses are loaded
 
         except TimeoutException:
             self._log(
                 "Timeout, courses may not have loaded completely, but continuing extraction..."
             )
-            time.sleep(1)
 
         # Step 7: Extract course information and URLs
         page_source = self.driver.page_source
 
         courses = self.extract_courses(page_source)
 
-        # Also extract course URLs for downloading
-        soup = BeautifulSoup(page_source, "html.parser")
-        course_links = soup.select('a[href*="course/view.php"]')
+        # Also extract course URLs for downloading; the browser resolves the
+        # hrefs, so no second parse of the page source is needed
         course_urls = {}
 
-        for link in course_links:
-            course_name = link.get_text(separator=" ", strip=True)
+        for course_name, href in self.driver.execute_script(COURSE_LINKS_SCRIPT):
             if (
                 course_name
                 and len(course_name) > 10
                 and not course_name.startswith("Course is starred")
             ):
-                href = link.get("href")
                 if href and course_name not in course_urls:
-                    # Make absolute URL
-                    if href.startswith("/"):
-                        href = f"https://moodle.hku.hk{href}"
                     course_urls[course_name] = href
 
         self.course_urls = course_urls
@@ -334,16 +1178,13 @@ class HKUMoodleScraper:
                 - downloaded_files_count: Total number of files downloaded
                 - downloaded_file_paths: List of absolute paths of downloaded files
         """
-        from urllib.parse import unquote
-
         self.logger.info(f"\n{'='*50}", force=True)
         self.logger.info("Starting to download course materials...", force=True)
         self.logger.info(f"{'='*50}\n", force=True)
 
         # Create base directory
-        if not os.path.exists(base_dir):
-            os.makedirs(base_dir)
-            self._log(f"Created base directory: {base_dir}")
+        os.makedirs(base_dir, exist_ok=True)
+        self._load_page_cache(base_dir)
 
         downloaded_files_count = 0
         downloaded_file_paths = []  # Track all downloaded file paths
@@ -364,9 +1205,6 @@ class HKUMoodleScraper:
             course_urls_to_download = self.course_urls
             total_courses = len(course_urls_to_download)
 
-        # Valid file extensions for knowledge base
-        VALID_EXTENSIONS = {".pdf", ".doc", ".docx", ".ppt", ".pptx", ".txt", ".md"}
-
         for idx, (course_name, course_url) in enumerate(
             course_urls_to_download.items(), 1
         ):
@@ -394,323 +1232,554 @@ class HKUMoodleScraper:
             safe_course_name = self._sanitize_filename(course_name)
             course_dir = os.path.join(base_dir, safe_course_name)
 
-            if not os.path.exists(course_dir):
-                os.makedirs(course_dir)
-                self._log(f"Created course directory: {course_dir}")
+            os.makedirs(course_dir, exist_ok=True)
 
             # Track files already in directory to avoid duplicates
-            existing_files = set(f.lower() for f in os.listdir(course_dir))
-            downloaded_in_this_run = set()
+            existing_files = _existing_files(course_dir)
+            queued_in_this_run = set()
 
             try:
-                # Navigate to course page
-                self.driver.get(course_url)
-                time.sleep(0.5)
+                # Prefer the Web Services file list; scrape the course page otherwise
+                download_links = None
+                if self._get_ws_token():
+                    try:
+                        download_links = self._find_course_files_ws(course_url)
+                    except (requests.RequestException, ValueError, RuntimeError) as e:
+                        self._log(f"Web Services file list failed, scraping page: {e}")
+                if download_links is None:
+                    download_links = self._find_course_files_html(course_url)
 
-                # Get all downloadable resources
-                page_source = self.driver.page_source
-                soup = BeautifulSoup(page_source, "html.parser")
+                self._log(f"Found {len(download_links)} downloadable files")
 
-                # Strategy: Find resource/folder links, fetch their HTML with requests,
-                # then extract pluginfile.php links (avoids triggering browser downloads)
+                # Check for duplicates, then download the rest concurrently
+                pending = []
+                for idx, (filename, file_url) in enumerate(download_links.items(), 1):
+                    filename_lower = filename.lower()
+                    if (
+                        filename_lower in existing_files
+                        or filename_lower in queued_in_this_run
+                    ):
+                        self._log(
+                            f"  [{idx}/{len(download_links)}] {filename} - Already exists"
+                        )
+                        continue
+                    queued_in_this_run.add(filename_lower)
+                    pending.append((f"{idx}/{len(download_links)}", filename, file_url))
 
-                import requests
+                new_paths = self._download_files_parallel(pending, course_dir)
+                downloaded_files_count += len(new_paths)
+                downloaded_file_paths.extend(new_paths)  # Record absolute paths
 
-                # Get cookies from Selenium for authenticated requests
-                selenium_cookies = self.driver.get_cookies()
-                session = requests.Session()
-                for cookie in selenium_cookies:
-                    session.cookies.set(cookie["name"], cookie["value"])
+                self.logger.info(
+                    f"  ✓ Completed: {course_name} ({len(new_paths)} new files)",
+                    force=True,
+                )
 
-                download_links = []
+            except Exception as e:
+                self.logger.error(f"  ✗ Error processing course {course_name}: {e}")
+                self._log(f"Error details: {e}")
+                continue
 
-                # Find all resource and folder links
-                for link in soup.find_all("a", href=True):
-                    href = link.get("href", "")
-                    text = link.get_text(strip=True)
+        self.logger.info(f"\n{'='*50}", force=True)
+        self.logger.info("Download completed!", force=True)
+        self.logger.info(
+            f"Total files downloaded: {downloaded_files_count}", force=True
+        )
+        self.logger.info(f"Saved to: {os.path.abspath(base_dir)}", force=True)
+        self.logger.info(f"{'='*50}\n", force=True)
 
-                    # Make absolute URL first
-                    if href.startswith("/"):
-                        href = f"https://moodle.hku.hk{href}"
+        self._save_page_cache()
+        return downloaded_files_count, downloaded_file_paths
 
-                    # Case 1: Direct pluginfile.php links - download directly
-                    if "/pluginfile.php" in href:
+    def _find_course_files_ws(self, course_url):
+        """
+        List a course's downloadable files with core_course_get_contents
 
-                        filename = href.split("/")[-1].split("?")[0]
-                        filename = unquote(filename)
+        One JSON call returns every module's files (URL, name, size), so no
+        course or resource page has to be rendered or parsed.
 
-                        if not filename or len(filename) < 3:
-                            continue
+        Args:
+            course_url (str): Course URL containing ?id=<course id>
 
-                        # Skip images and archives
-                        if any(
-                            ext in filename.lower()
-                            for ext in [
-                                ".png",
-                                ".jpg",
-                                ".jpeg",
-                                ".gif",
-                                ".ico",
-                                ".svg",
-                                ".zip",
-                                ".rar",
-                                ".7z",
-                                ".gz",
-                                ".tar",
-                            ]
-                        ):
-                            continue
+        Returns:
+            dict: filename -> URL; URLs carry the token for download
+        """
+        course_id = parse_qs(urlparse(course_url).query).get("id", [None])[0]
+        if not course_id:
+            raise ValueError(f"No course id in {course_url}")
+
+        contents = self._ws_call("core_course_get_contents", courseid=course_id)
 
-                        # Only include document files
-                        file_ext = os.path.splitext(filename)[1].lower()
-                        if file_ext in [
-                            ".pdf",
-                            ".doc",
-                            ".docx",
-                            ".ppt",
-                            ".pptx",
-                            ".txt",
-                            ".md",
-                        ]:
-                            self._log(f"    Found direct file: {filename}")
-                            download_links.append({"filename": filename, "url": href})
+        download_links = {}
+        for section in contents:
+            for module in section.get("modules") or []:
+                for item in module.get("contents") or []:
+                    if item.get("type") != "file":
                         continue
+                    filename = item.get("filename", "")
+                    file_ext = os.path.splitext(filename)[1].lower()
+                    if file_ext not in VALID_EXTENSIONS or filename in download_links:
+                        continue
+                    file_url = item["fileurl"]
+                    separator = "&" if "?" in file_url else "?"
+                    download_links[filename] = (
+                        f"{file_url}{separator}token={self.token}"
+                    )
+                    self._log(f"    Found: {filename}")
 
-                    # Case 2: Resource/folder pages - fetch HTML to extract links
-                    if (
-                        "/mod/resource/view.php" in href
-                        or "/mod/folder/view.php" in href
-                    ):
-                        # Skip archive files
-                        if any(
-                            ext in href.lower()
-                            for ext in [".zip", ".rar", ".7z", ".gz", ".tar"]
-                        ):
-                            self._log(f"    Skipping archive: {text}")
-                            continue
+        return download_links
 
-                        try:
-                            # Fetch resource page to check what it returns
-                            self._log(f"    Checking: {text[:60]}")
-                            response = session.get(
-                                href, timeout=10, allow_redirects=True
-                            )
+    def _find_course_files_html(self, course_url):
+        """
+        List a course's downloadable files by scraping the course page
 
-                            # Check content type
-                            content_type = response.headers.get("Content-Type", "")
+        Fallback for when Web Services are unavailable.
 
-                            # If it's a direct file (not HTML), treat the URL as download link
-                            if "html" not in content_type:
-                                # Extract filename from URL or Content-Disposition
-                                filename = None
-                                content_disp = response.headers.get(
-                                    "Content-Disposition", ""
-                                )
-                                if "filename=" in content_disp:
-                                    filename = content_disp.split("filename=")[
-                                        -1
-                                    ].strip("\"'")
-
-                                if not filename:
-                                    # Try to extract from URL
-                                    filename = response.url.split("/")[-1].split("?")[0]
-
-                                    filename = unquote(filename)
-
-                                # Check if valid document
-                                if filename and len(filename) > 3:
-                                    file_ext = os.path.splitext(filename)[1].lower()
-                                    if file_ext in [
-                                        ".pdf",
-                                        ".doc",
-                                        ".docx",
-                                        ".ppt",
-                                        ".pptx",
-                                        ".txt",
-                                        ".md",
-                                    ]:
-                                        self._log(
-                                            f"      Found direct file: {filename}"
-                                        )
-                                        download_links.append(
-                                            {"filename": filename, "url": response.url}
-                                        )
-                                continue
-
-                            # Parse HTML with explicit encoding to avoid charset detection hang
-                            resource_soup = BeautifulSoup(
-                                response.content, "html.parser", from_encoding="utf-8"
-                            )
+        Args:
+            course_url (str): Course URL
 
-                            # Extract pluginfile.php links
-                            for file_link in resource_soup.find_all("a", href=True):
-                                file_href = file_link.get("href", "")
-
-                                if "/pluginfile.php" in file_href:
-                                    if file_href.startswith("/"):
-                                        file_href = f"https://moodle.hku.hk{file_href}"
-
-                                    filename = file_href.split("/")[-1].split("?")[0]
-                                    filename = unquote(filename)
-
-                                    if not filename or len(filename) < 3:
-                                        continue
-                                    if any(
-                                        ext in filename.lower()
-                                        for ext in [
-                                            ".png",
-                                            ".jpg",
-                                            ".jpeg",
-                                            ".gif",
-                                            ".ico",
-                                            ".svg",
-                                        ]
-                                    ):
-                                        continue
-
-                                    file_ext = os.path.splitext(filename)[1].lower()
-
-                                    if file_ext in [
-                                        ".zip",
-                                        ".rar",
-                                        ".7z",
-                                        ".gz",
-                                        ".tar",
-                                    ]:
-                                        continue
-
-                                    if file_ext in VALID_EXTENSIONS:
-                                        if not any(
-                                            d["filename"] == filename
-                                            for d in download_links
-                                        ):
-                                            download_links.append(
-                                                {"filename": filename, "url": file_href}
-                                            )
-                                            self._log(f"      Found: {filename}")
-
-                            # Check for embedded objects/iframes
-                            for obj in resource_soup.find_all(
-                                ["object", "embed", "iframe"]
-                            ):
-                                url = obj.get("data") or obj.get("src")
-                                if url and "/pluginfile.php" in url:
-                                    if url.startswith("/"):
-                                        url = f"https://moodle.hku.hk{url}"
-
-                                    filename = url.split("/")[-1].split("?")[0]
-                                    filename = unquote(filename)
-                                    file_ext = os.path.splitext(filename)[1].lower()
-
-                                    if file_ext in VALID_EXTENSIONS:
-                                        if not any(
-                                            d["filename"] == filename
-                                            for d in download_links
-                                        ):
-                                            download_links.append(
-                                                {"filename": filename, "url": url}
-                                            )
-                                            self._log(
-                                                f"      Found (embedded): {filename}"
-                                            )
-
-                        except Exception as e:
-                            self._log(f"      Error: {e}")
-                            continue
+        Returns:
+            dict: filename -> URL, in page order
+        """
+        # Navigate to course page
+        self._open_course_page(course_url)
 
-                self._log(f"Found {len(download_links)} downloadable files")
+        # Get all downloadable resources
+        page_source = self.driver.page_source
+        soup = BeautifulSoup(page_source, HTML_PARSER)
 
-                # Download each file
-                for idx, item in enumerate(download_links, 1):
-                    try:
-                        filename = item["filename"]
-                        file_url = item["url"]
+        # Strategy: Find resource/folder links, fetch their HTML with requests,
+        # then extract pluginfile.php links (avoids triggering browser downloads)
 
-                        # Check for duplicates
-                        if (
-                            filename.lower() in existing_files
-                            or filename.lower() in downloaded_in_this_run
-                        ):
-                            self._log(
-                                f"  [{idx}/{len(download_links)}] {filename} - Already exists"
-                            )
-                            continue
+        download_links = {}  # filename -> URL; first occurrence wins
+        resource_pages = []  # (href, text) of resource/folder pages to probe
 
-                        self._log(
-                            f"  [{idx}/{len(download_links)}] Downloading: {filename}"
-                        )
+        # Find all resource and folder links
+        for link in soup.select(COURSE_FILE_LINK_SELECTOR):
+            href = link.get("href", "")
+            text = link.get_text(strip=True)
 
-                        # Download file
-                        file_path = os.path.join(course_dir, filename)
+            # Make absolute URL first
+            if href.startswith("/"):
+                href = f"https://moodle.hku.hk{href}"
 
-                        if self._download_file_safe(file_url, file_path):
-                            downloaded_in_this_run.add(filename.lower())
-                            downloaded_files_count += 1
-                            downloaded_file_paths.append(os.path.abspath(file_path))  # Record absolute path
-                            self._log(f"      ✓ Downloaded")
-                        else:
-                            self._log(f"      ✗ Failed")
+            # Case 1: Direct pluginfile.php links - download directly
+            if "/pluginfile.php" in href:
 
-                    except Exception as e:
-                        self._log(f"      Error: {e}")
-                        continue
+                filename = _filename_from_url(href)
 
-                self.logger.info(
-                    f"  ✓ Completed: {course_name} ({len(downloaded_in_this_run)} new files)",
-                    force=True,
+                if not filename or len(filename) < 3:
+                    continue
+
+                # Skip images and archives, only include document files
+                file_ext = os.path.splitext(filename)[1].lower()
+                if file_ext in BLOCKED_EXTENSIONS:
+                    continue
+                if file_ext in VALID_EXTENSIONS:
+                    self._log(f"    Found direct file: {filename}")
+                    download_links.setdefault(filename, href)
+                continue
+
+            # Case 2: Resource/folder pages - fetch HTML to extract links
+            if (
+                "/mod/resource/view.php" in href
+                or "/mod/folder/view.php" in href
+            ):
+                # Skip archive files
+                href_ext = os.path.splitext(urlparse(href).path)[1].lower()
+                if href_ext in ARCHIVE_EXTENSIONS:
+                    self._log(f"    Skipping archive: {text}")
+                    continue
+
+                resource_pages.append((href, text))
+
+        # The probes are independent and latency-bound, so fetch them
+        # concurrently; parsing stays on this thread, in page order
+        with ThreadPoolExecutor(max_workers=RESOURCE_PROBE_WORKERS) as executor:
+            probes = list(
+                executor.map(
+                    lambda page: self._probe_resource(page[0]),
+                    resource_pages,
                 )
+            )
 
-            except Exception as e:
-                self.logger.error(f"  ✗ Error processing course {course_name}: {e}")
-                self._log(f"Error details: {e}")
+        for (href, text), (response, error) in zip(resource_pages, probes):
+            self._log(f"    Checking: {text[:60]}")
+            if error is not None:
+                self._log(f"      Error: {error}")
                 continue
 
-        self.logger.info(f"\n{'='*50}", force=True)
-        self.logger.info("Download completed!", force=True)
-        self.logger.info(
-            f"Total files downloaded: {downloaded_files_count}", force=True
+            cached = self._page_cache.get(href)
+            if response.status_code == 304 and cached:
+                self._log("      Not modified, using cached file list")
+                page_links = cached["links"]
+            else:
+                try:
+                    page_links = self._parse_resource_page(response)
+                except Exception as e:
+                    self._log(f"      Error: {e}")
+                    continue
+                self._remember_page(href, response, page_links)
+
+            for filename, file_url in page_links.items():
+                download_links.setdefault(filename, file_url)
+
+        return download_links
+
+    def _parse_resource_page(self, response):
+        """
+        Extract document links from a probed resource/folder page
+
+        Args:
+            response: requests.Response from _probe_resource
+
+        Returns:
+            dict: filename -> URL of the documents the page leads to
+        """
+        page_links = {}
+
+        # Check content type
+        content_type = response.headers.get("Content-Type", "")
+
+        # If it's a direct file (not HTML), treat the URL as download link
+        if "html" not in content_type:
+            # Extract filename from URL or Content-Disposition
+            filename = None
+            content_disp = response.headers.get("Content-Disposition", "")
+            if "filename=" in content_disp:
+                filename = content_disp.split("filename=")[-1].strip("\"'")
+
+            if not filename:
+                # Try to extract from URL
+                filename = _filename_from_url(response.url)
+
+            # Check if valid document
+            if filename and len(filename) > 3:
+                file_ext = os.path.splitext(filename)[1].lower()
+                if file_ext in VALID_EXTENSIONS:
+                    self._log(f"      Found direct file: {filename}")
+                    page_links.setdefault(filename, response.url)
+            return page_links
+
+        # Parse HTML with explicit encoding to avoid charset detection hang
+        resource_soup = BeautifulSoup(
+            response.content, HTML_PARSER, from_encoding="utf-8"
         )
-        self.logger.info(f"Saved to: {os.path.abspath(base_dir)}", force=True)
-        self.logger.info(f"{'='*50}\n", force=True)
 
-        return downloaded_files_count, downloaded_file_paths
+        # Extract pluginfile.php links
+        for file_link in resource_soup.select(PLUGINFILE_LINK_SELECTOR):
+            file_href = file_link.get("href", "")
+
+            if "/pluginfile.php" in file_href:
+                if file_href.startswith("/"):
+                    file_href = f"https://moodle.hku.hk{file_href}"
+
+                filename = _filename_from_url(file_href)
+
+                if not filename or len(filename) < 3:
+                    continue
+
+                file_ext = os.path.splitext(filename)[1].lower()
+                if file_ext in BLOCKED_EXTENSIONS:
+                    continue
+
+                if file_ext in VALID_EXTENSIONS and filename not in page_links:
+                    page_links[filename] = file_href
+                    self._log(f"      Found: {filename}")
+
+        # Check for embedded objects/iframes
+        for obj in resource_soup.find_all(["object", "embed", "iframe"]):
+            url = obj.get("data") or obj.get("src")
+            if url and "/pluginfile.php" in url:
+                if url.startswith("/"):
+                    url = f"https://moodle.hku.hk{url}"
 
-    def _download_file_safe(self, url, filepath):
+                filename = _filename_from_url(url)
+                file_ext = os.path.splitext(filename)[1].lower()
+
+                if file_ext in VALID_EXTENSIONS and filename not in page_links:
+                    page_links[filename] = url
+                    self._log(f"      Found (embedded): {filename}")
+
+        return page_links
+
+    def _load_page_cache(self, base_dir):
+        """
+        Load the resource page cache (validators and file lists) from base_dir
+
+        Args:
+            base_dir (str): Knowledge base directory holding .moodle_cache.json
+        """
+        self._cache_path = os.path.join(base_dir, PAGE_CACHE_FILE)
+        try:
+            with open(self._cache_path, "r", encoding="utf-8") as f:
+                self._page_cache = json.load(f)
+        except (OSError, ValueError):
+            self._page_cache = {}
+
+    def _save_page_cache(self):
+        """Write the resource page cache atomically (temp file + os.replace)"""
+        if not self._cache_path:
+            return
+        tmp_path = f"{self._cache_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._page_cache, f, ensure_ascii=False)
+            os.replace(tmp_path, self._cache_path)
+        except OSError as e:
+            self._log(f"Could not save page cache: {e}")
+
+    def _remember_page(self, href, response, page_links):
+        """
+        Cache a page's links with its ETag/Last-Modified
+
+        Args:
+            href (str): Resource, folder or NLP index page URL
+            response: requests.Response the links were parsed from
+            page_links: Links found on the page (filename -> URL for Moodle
+                pages, document hrefs for the NLP index)
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not response.ok or not (etag or last_modified):
+            # Nothing to revalidate against next run
+            self._page_cache.pop(href, None)
+            return
+        self._page_cache[href] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "links": page_links,
+        }
+
+    def _conditional_headers(self, href):
+        """
+        If-None-Match/If-Modified-Since headers for a page in the page cache
+
+        Args:
+            href (str): Page URL
+
+        Returns:
+            dict: Request headers (empty when the page is not cached)
+        """
+        headers = {}
+        cached = self._page_cache.get(href)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        return headers
+
+    def _probe_resource(self, href):
+        """
+        Fetch a resource/folder page (runs on a probe worker thread)
+
+        A HEAD request comes first: resources that redirect to a file only need
+        the final URL and headers, so their body is never downloaded. The page
+        is fetched with GET only when it is HTML that has to be parsed. Both are
+        conditional when the page is in the cache.
+
+        Args:
+            href (str): Resource or folder page URL
+
+        Returns:
+            tuple: (response, None) on success, (None, exception) on failure
+        """
+        # Revalidate pages cached by an earlier run: 304 means reuse its file list
+        headers = self._conditional_headers(href)
+
+        # Spread the burst of requests a little so Moodle is not hit all at once
+        time.sleep(random.uniform(0, RESOURCE_PROBE_JITTER))
+        try:
+            head = self._http.head(
+                href, headers=headers, timeout=10, allow_redirects=True
+            )
+            if head.status_code == 304:
+                return head, None
+            content_type = head.headers.get("Content-Type", "")
+            if head.ok and content_type and "html" not in content_type:
+                return head, None
+            response = self._http.get(
+                href, headers=headers, timeout=10, allow_redirects=True
+            )
+            return response, None
+        except requests.RequestException as e:
+            return None, e
+
+    def _download_files_parallel(
+        self, pending, course_dir, max_workers=DOWNLOAD_WORKERS
+    ):
+        """
+        Download a course's files on a bounded thread pool
+
+        A file downloaded by an earlier run but no longer on disk (renamed or
+        removed locally) is only fetched again if the server copy changed; an
+        empty leftover of an interrupted download is always fetched again.
+        To force a re-download, delete the file's entry from the course
+        folder's .rag_etags.json (or the whole file).
+
+        Args:
+            pending (list): (progress label, filename, URL) entries
+            course_dir (str): Directory to save the files in
+            max_workers (int): Concurrent downloads (callers sharing this
+                scraper's session split DOWNLOAD_WORKERS between them)
+
+        Returns:
+            list: Absolute paths of the files that downloaded successfully
+        """
+        # Resolved once; the returned paths are joined onto it
+        course_dir = os.path.abspath(course_dir)
+        if not pending:
+            return []
+
+        etags = _load_etags(course_dir)
+        known_etags = dict(etags)
+
+        def download(entry):
+            progress, filename, file_url = entry
+            file_path = os.path.join(course_dir, filename)
+            etag = known_etags.get(filename)
+            if etag and os.path.exists(file_path):
+                # Pending yet on disk: an empty leftover that _existing_files
+                # rejected. Its ETag describes a download that never completed
+                etag = None
+                etags.pop(filename, None)
+            if etag and self._is_unchanged(file_url, etag):
+                self._log(f"  [{progress}] {filename} - Unchanged since last download")
+                return None
+            self._log(f"  [{progress}] Downloading: {filename}")
+            if self._download_file_safe(file_url, file_path, etags):
+                self._log(f"      ✓ Downloaded: {filename}")
+                return file_path
+            self._log(f"      ✗ Failed: {filename}")
+            return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(download, pending))
+        if etags != known_etags:
+            _save_etags(course_dir, etags)
+        return [path for path in results if path]
+
+    def _is_unchanged(self, url, etag):
+        """
+        Ask the server whether a file still has the ETag it was downloaded with
+
+        Args:
+            url (str): File URL
+            etag (str): ETag recorded when the file was downloaded
+
+        Returns:
+            bool: True if the server answered 304 Not Modified
+        """
+        try:
+            response = self._http.head(
+                url, headers={"If-None-Match": etag}, timeout=10, allow_redirects=True
+            )
+        except requests.RequestException:
+            return False
+        return response.status_code == 304
+
+    async def _download_files_async(self, pending, course_dir):
+        """
+        Download files concurrently on one event loop with aiohttp
+
+        At most DOWNLOAD_WORKERS requests are in flight; bodies are streamed to
+        disk in DOWNLOAD_CHUNK_SIZE pieces. No Moodle cookies are sent.
+
+        Args:
+            pending (list): (progress label, filename, URL) entries
+            course_dir (str): Directory to save the files in
+
+        Returns:
+            list: Absolute paths of the files that downloaded successfully
+        """
+        course_dir = os.path.abspath(course_dir)
+        semaphore = asyncio.Semaphore(DOWNLOAD_WORKERS)
+        connector = aiohttp.TCPConnector(
+            limit=2 * DOWNLOAD_WORKERS,
+            limit_per_host=DOWNLOAD_WORKERS,
+            keepalive_timeout=30,
+        )
+        timeout = aiohttp.ClientTimeout(sock_connect=CONNECT_TIME_OUT, sock_read=30)
+
+        async def fetch(session, progress, filename, file_url):
+            file_path = os.path.join(course_dir, filename)
+            partial_path = file_path + PARTIAL_SUFFIX
+            self._log(f"  [{progress}] Downloading: {filename}")
+            try:
+                async with semaphore, session.get(file_url) as response:
+                    response.raise_for_status()
+                    # Disk I/O runs on worker threads so a slow write never
+                    # stalls the other downloads sharing this event loop
+                    f = await asyncio.to_thread(open, partial_path, "wb")
+                    try:
+                        async for chunk in response.content.iter_chunked(
+                            DOWNLOAD_CHUNK_SIZE
+                        ):
+                            await asyncio.to_thread(f.write, chunk)
+                    finally:
+                        await asyncio.to_thread(f.close)
+                await asyncio.to_thread(os.replace, partial_path, file_path)
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                self._log(f"      ✗ Failed: {filename} - {e}")
+                _remove_partial(partial_path)
+                return None
+            self._log(f"      ✓ Downloaded: {filename}")
+            return file_path
+
+        async with aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={"User-Agent": BROWSER_USER_AGENT},
+        ) as session:
+            results = await asyncio.gather(
+                *(fetch(session, *entry) for entry in pending)
+            )
+        return [path for path in results if path]
+
+    def _download_file_safe(self, url, filepath, etags=None):
         """
         Download file with error handling and return success status
 
         Args:
             url (str): File URL
             filepath (str): Local file path to save
+            etags (dict, optional): filename -> ETag; updated with the
+                response's ETag when the download succeeds
 
         Returns:
             bool: True if download succeeded, False otherwise
         """
-        import requests
-
+        partial_path = filepath + PARTIAL_SUFFIX
         try:
-            # Get cookies from Selenium
-            selenium_cookies = self.driver.get_cookies()
-
-            # Create session with cookies
-            session = requests.Session()
-            for cookie in selenium_cookies:
-                session.cookies.set(cookie["name"], cookie["value"])
-
             # Download
-            response = session.get(url, stream=True, timeout=30)
-            response.raise_for_status()
-
-            # Save
-            with open(filepath, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            response = self._http.get(url, stream=True, timeout=30)
+            if response.status_code in (401, 403):
+                # Moodle session expired: refresh cookies from the browser once
+                response.close()
+                self._sync_cookies_from_selenium()
+                response = self._http.get(url, stream=True, timeout=30)
+            with response:
+                response.raise_for_status()
+
+                # Save: stream straight from the socket in 1 MiB reads, so memory
+                # stays flat whatever the file size (decode_content undoes gzip).
+                # The file only gets its real name once complete, so an
+                # interrupted download is never mistaken for an existing file
+                response.raw.decode_content = True
+                with open(partial_path, "wb") as f:
+                    shutil.copyfileobj(response.raw, f, DOWNLOAD_CHUNK_SIZE)
+            os.replace(partial_path, filepath)
+
+            etag = response.headers.get("ETag")
+            if etags is not None and etag:
+                etags[os.path.basename(filepath)] = etag
 
             return True
 
         except Exception as e:
             self._log(f"        Download failed: {e}")
+            _remove_partial(partial_path)
             return False
 
     def _download_nlp_course(self, base_dir, course_name):
@@ -726,8 +1795,6 @@ class HKUMoodleScraper:
                 - downloaded_count: Number of files downloaded
                 - downloaded_paths: List of absolute paths of downloaded files
         """
-        import requests
-
         nlp_url = "https://nlp.cs.hku.hk/comp7607-fall2025/"
 
         self.logger.info(f"  Downloading from external site: {nlp_url}", force=True)
@@ -735,63 +1802,69 @@ class HKUMoodleScraper:
         # Create course directory
         safe_course_name = self._sanitize_filename(course_name)
         course_dir = os.path.join(base_dir, safe_course_name)
-        if not os.path.exists(course_dir):
-            os.makedirs(course_dir)
-
-        existing_files = set(f.lower() for f in os.listdir(course_dir))
-        downloaded_count = 0
-        downloaded_paths = []  # Track downloaded file paths
+        os.makedirs(course_dir, exist_ok=True)
 
+        existing_files = _existing_files(course_dir)
         try:
-            # Get page content (no authentication needed)
-            response = requests.get(nlp_url, timeout=30)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, "html.parser")
-
-            # Find all document links
-            all_links = soup.find_all("a", href=True)
-
-            for link in all_links:
-                href = link.get("href")
-
-                # Check if it's a document
-                if any(
-                    ext in href.lower()
-                    for ext in [".pdf", ".pptx", ".ppt", ".doc", ".docx"]
-                ):
-                    # Make absolute URL
-                    if href.startswith("/"):
-                        file_url = f"https://nlp.cs.hku.hk{href}"
-                    elif href.startswith("http"):
-                        file_url = href
-                    else:
-                        file_url = f"https://nlp.cs.hku.hk/comp7607-fall2025/{href}"
-
-                    # Extract filename
-                    filename = href.split("/")[-1]
-
-                    # Check duplicate
-                    if filename.lower() in existing_files:
-                        self._log(f"    Already exists: {filename}")
-                        continue
-
-                    # Download
-                    filepath = os.path.join(course_dir, filename)
-                    try:
-                        file_response = requests.get(file_url, timeout=30)
-                        file_response.raise_for_status()
-
-                        with open(filepath, "wb") as f:
-                            f.write(file_response.content)
-
-                        self._log(f"    ✓ {filename}")
-                        downloaded_count += 1
-                        downloaded_paths.append(os.path.abspath(filepath))  # Record absolute path
-
-                    except Exception as e:
-                        self._log(f"    Failed: {filename} - {e}")
-                        continue
+            # Get page content (no authentication needed); the shared keep-alive
+            # session is reused for the index and every file. The index rarely
+            # changes, so it is revalidated against the page cache
+            response = self._http.get(
+                nlp_url, headers=self._conditional_headers(nlp_url), timeout=30
+            )
+            cached = self._page_cache.get(nlp_url)
+            if response.status_code == 304 and cached:
+                self._log("  Index not modified, using cached document links")
+                doc_hrefs = cached["links"]
+            else:
+                response.raise_for_status()
+
+                # Find all document links
+                doc_hrefs = [
+                    href
+                    for _, href in _select_links(
+                        response.content, "a[href]", LINK_STRAINER
+                    )
+                    if NLP_DOC_EXT_RE.search(href)
+                ]
+                self._remember_page(nlp_url, response, doc_hrefs)
+
+            pending = []
+
+            for href in doc_hrefs:
+                # Make absolute URL
+                if href.startswith("/"):
+                    file_url = f"https://nlp.cs.hku.hk{href}"
+                elif href.startswith("http"):
+                    file_url = href
+                else:
+                    file_url = f"https://nlp.cs.hku.hk/comp7607-fall2025/{href}"
+
+                # Extract filename: decoded, without query or fragment, so it
+                # compares equal to the name saved on disk
+                filename = _filename_from_url(href)
+                if not filename:
+                    continue
+
+                # Check duplicate (on disk, or linked twice on the page)
+                filename_lower = filename.lower()
+                if filename_lower in existing_files:
+                    self._log(f"    Already exists: {filename}")
+                    continue
+                existing_files.add(filename_lower)
+
+                pending.append((f"NLP {len(pending) + 1}", filename, file_url))
+
+            # The public site needs no cookies, so with aiohttp every file is
+            # fetched on one event loop; otherwise use the Moodle download pool.
+            # asyncio.run() cannot nest, so callers inside a loop use the pool
+            if aiohttp is not None and pending and not _in_event_loop():
+                downloaded_paths = asyncio.run(
+                    self._download_files_async(pending, course_dir)
+                )
+            else:
+                downloaded_paths = self._download_files_parallel(pending, course_dir)
+            downloaded_count = len(downloaded_paths)
 
             self.logger.info(
                 f"  ✓ NLP course completed: {downloaded_count} files", force=True
@@ -802,7 +1875,8 @@ class HKUMoodleScraper:
             self.logger.error(f"  ✗ Error downloading NLP course: {e}")
             return 0, []
 
-    def _sanitize_filename(self, filename):
+    @staticmethod
+    def _sanitize_filename(filename):
         """
         Sanitize filename for filesystem compatibility
 
@@ -812,21 +1886,14 @@ class HKUMoodleScraper:
         Returns:
             str: Sanitized filename
         """
-        # Remove invalid characters
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, "_")
-
-        # Limit length
-        if len(filename) > 200:
-            filename = filename[:200]
-
-        return filename.strip()
+        return sanitize_filename(filename)
 
     def close(self):
         self._log("Closing browser...")
-        self.driver.quit()
-        self._log("Browser closed")
+        if self._release_driver():
+            self._log("Browser returned to pool")
+        else:
+            self._log("Browser closed")
 
     def extract_courses(self, html_content):
         """Extract course information from HTML content
@@ -834,49 +1901,32 @@ class HKUMoodleScraper:
         Returns:
             list: List of dicts with 'course_name' and 'course_id' keys
         """
-        import re
-        from urllib.parse import urlparse, parse_qs
-        
-        soup = BeautifulSoup(html_content, "html.parser")
-
         courses = []
         seen_courses = set()  # Track (name, id) pairs to avoid duplicates
 
         # Method 1: Extract from "My courses" page - Find course cards and links
         self._log("Method 1: Finding course cards and links...")
 
-        # First try to find all links containing course information
-        course_links = soup.select('a[href*="course/view.php"]')
+        # First try to find all links containing course information. Only
+        # these links are parsed; the full tree is built only if a fallback
+        # method has to run
+        course_links = _select_links(
+            html_content, COURSE_LINK_SELECTOR, COURSE_LINK_STRAINER
+        )
         if course_links:
             self._log(f"Found {len(course_links)} course links")
-            for link in course_links:
-                # Get complete text of link, including all sub-elements
-                course_name = link.get_text(separator=" ", strip=True)
-
+            # Complete text of each link, including all sub-elements
+            for course_name, href in course_links:
                 # Filter out too short or meaningless text
                 if course_name and len(course_name) > 10:
                     # Exclude some common navigation links and duplicate "Course is starred" text
-                    excluded_texts = [
-                        "Click to enter this course",
-                        "Course",
-                        "View",
-                        "Go to course",
-                        "Enter course",
-                    ]
-
-                    # Check if starts with excluded keywords
-                    is_valid = True
-                    if course_name.startswith("Course is starred"):
-                        is_valid = False
-                    else:
-                        for excluded in excluded_texts:
-                            if course_name == excluded:
-                                is_valid = False
-                                break
+                    is_valid = (
+                        not course_name.startswith("Course is starred")
+                        and course_name not in EXCLUDED_COURSE_TEXTS
+                    )
 
                     # Extract course ID from URL
                     if is_valid:
-                        href = link.get('href', '')
                         course_id = None
                         
                         # Try to extract ID from URL parameter
@@ -889,7 +1939,7 @@ class HKUMoodleScraper:
                                     course_id = int(params['id'][0])
                             elif 'id=' in href:
                                 # Simple regex fallback
-                                match = re.search(r'id=(\d+)', href)
+                                match = COURSE_ID_RE.search(href)
                                 if match:
                                     course_id = int(match.group(1))
                         except (ValueError, IndexError) as e:
@@ -904,119 +1954,97 @@ class HKUMoodleScraper:
                             })
                             seen_courses.add((course_name, course_id))
 
-        # Method 2: Find course cards (as supplement)
         if not courses:
+            soup = BeautifulSoup(html_content, HTML_PARSER)
+
+        # Methods 2-4 look for the same course/view.php links through the page
+        # structure. When Method 1 saw none there is no course ID to find, so
+        # the tree is not walked again for each of them
+        run_fallbacks = not courses and bool(course_links)
+
+        def add_course(course_name, href):
+            """Record a course when href carries its ID and it is not a duplicate"""
+            match = COURSE_ID_RE.search(href)
+            if not (course_name and match):
+                return
+            course_id = int(match.group(1))
+            if (course_name, course_id) not in seen_courses:
+                courses.append({
+                    'course_name': course_name,
+                    'course_id': course_id
+                })
+                seen_courses.add((course_name, course_id))
+
+        # Method 2: Find course cards (as supplement)
+        if run_fallbacks and not courses:
             self._log("Method 2: Finding course cards...")
-            course_cards = soup.select("div.card-deck div.card, div.coursebox")
+            course_cards = soup.select(COURSE_CARD_SELECTOR)
             if course_cards:
                 self._log(f"Found {len(course_cards)} course cards")
                 for card in course_cards:
                     # Find course name element
+                    course_link = card.find("a", href=COURSE_VIEW_HREF_RE)
                     course_name_elem = (
-                        card.select_one("h3.card-title a")
-                        or card.select_one(".coursename a")
-                        or card.select_one("a[href*='course/view.php']")
-                        or card.select_one("h3")
+                        card.select_one(COURSE_CARD_TITLE_SELECTOR)
+                        or card.select_one(COURSE_BOX_NAME_SELECTOR)
+                        or course_link
+                        or card.find("h3")
                     )
 
                     if course_name_elem:
                         course_name = course_name_elem.get_text(
                             separator=" ", strip=True
                         )
-                        
+
                         # Extract course ID
                         if course_name_elem.name == 'a':
                             href = course_name_elem.get('href', '')
                         else:
-                            link = card.select_one("a[href*='course/view.php']")
-                            href = link.get('href', '') if link else ''
-                        
-                        course_id = None
-                        try:
-                            if '?id=' in href or 'id=' in href:
-                                match = re.search(r'id=(\d+)', href)
-                                if match:
-                                    course_id = int(match.group(1))
-                        except (ValueError, IndexError):
-                            pass
-                        
-                        if course_name and course_id and (course_name, course_id) not in seen_courses:
-                            courses.append({
-                                'course_name': course_name,
-                                'course_id': course_id
-                            })
-                            seen_courses.add((course_name, course_id))
+                            href = course_link.get('href', '') if course_link else ''
+                        add_course(course_name, href)
 
         # Method 3: Find course list containers
-        if not courses:
+        if run_fallbacks and not courses:
             self._log("Method 3: Finding course list containers...")
-            course_containers = soup.select(
-                ".course-listitem, div[data-region='course-item'], .course-info-container, .coursebox"
-            )
+            course_containers = soup.select(COURSE_CONTAINER_SELECTOR)
             if course_containers:
                 self._log(f"Found {len(course_containers)} course containers")
                 for container in course_containers:
-                    course_link = container.select_one('a[href*="course/view.php"]')
+                    course_link = container.find("a", href=COURSE_VIEW_HREF_RE)
                     if course_link:
-                        course_name = course_link.get_text(separator=" ", strip=True)
-                        href = course_link.get('href', '')
-                        
-                        course_id = None
-                        try:
-                            if '?id=' in href or 'id=' in href:
-                                match = re.search(r'id=(\d+)', href)
-                                if match:
-                                    course_id = int(match.group(1))
-                        except (ValueError, IndexError):
-                            pass
-                        
-                        if course_name and course_id and (course_name, course_id) not in seen_courses:
-                            courses.append({
-                                'course_name': course_name,
-                                'course_id': course_id
-                            })
-                            seen_courses.add((course_name, course_id))
+                        add_course(
+                            course_link.get_text(separator=" ", strip=True),
+                            course_link.get('href', ''),
+                        )
 
         # Method 4: Find from Dashboard or other areas
-        if not courses:
+        if run_fallbacks and not courses:
             self._log("Method 4: Finding from main page area...")
-            main_region = soup.select_one("#region-main, .content, main")
+            main_region = soup.select_one(MAIN_REGION_SELECTOR)
             if main_region:
-                all_links = main_region.select('a[href*="course/view.php"]')
-                for link in all_links:
+                for link in main_region.find_all("a", href=COURSE_VIEW_HREF_RE):
                     course_name = link.get_text(separator=" ", strip=True)
-                    href = link.get('href', '')
-                    
-                    if course_name and len(course_name) > 10:
-                        course_id = None
-                        try:
-                            if '?id=' in href or 'id=' in href:
-                                match = re.search(r'id=(\d+)', href)
-                                if match:
-                                    course_id = int(match.group(1))
-                        except (ValueError, IndexError):
-                            pass
-                        
-                        if course_id and (course_name, course_id) not in seen_courses:
-                            courses.append({
-                                'course_name': course_name,
-                                'course_id': course_id
-                            })
-                            seen_courses.add((course_name, course_id))
+                    if len(course_name) > 10:
+                        add_course(course_name, link.get('href', ''))
 
+        # The listings below only go to the verbose log, so skip building
+        # their lines (and the tree search for the debug links) otherwise
         if not courses:
             self._log("No course information found")
-            # Output some debug information
-            self._log("\n=== Debug Information ===")
-            self._log(f"Page title: {soup.title.string if soup.title else 'None'}")
-            all_links = soup.find_all("a", href=True, limit=20)
-            self._log(f"First 20 links found:")
-            for i, link in enumerate(all_links, 1):
-                self._log(f"{i}. {link.text.strip()[:50]} -> {link['href'][:100]}")
+            if self.verbose:
+                # Output some debug information
+                title = soup.title.string if soup.title else "None"
+                self._log("\n=== Debug Information ===")
+                self._log(f"Page title: {title}")
+                all_links = soup.find_all("a", href=True, limit=20)
+                self._log("First 20 links found:")
+                for i, link in enumerate(all_links, 1):
+                    self._log(f"{i}. {link.text.strip()[:50]} -> {link['href'][:100]}")
         else:
-            self._log(f"\nSuccessfully found {len(courses)} courses:")
-            for i, course in enumerate(courses, 1):
-                self._log(f"{i}. {course['course_name']} (ID: {course['course_id']})")
+            if self.verbose:
+                self._log(f"\nSuccessfully found {len(courses)} courses:")
+                for i, course in enumerate(courses, 1):
+                    self._log(f"{i}. {course['course_name']} (ID: {course['course_id']})")
             self.courses = courses
 
         return courses
@@ -1035,9 +2063,14 @@ class HKUMoodleScraper:
 
 def main():
     """Main function"""
-    import argparse
-
-    parser = argparse.ArgumentParser(description="HKU Moodle Course Scraper")
+    parser = argparse.ArgumentParser(
+        description="HKU Moodle Course Scraper",
+        epilog=(
+            "Files deleted locally are only downloaded again once they change "
+            "on Moodle; remove their entries from the course folder's "
+            f"{ETAG_FILE} to force a re-download."
+        ),
+    )
     parser.add_argument(
         "-v", "--verbose", action="store_true", help="Enable verbose logging"
     )
@@ -6,18 +6,39 @@ Allows downloading from multiple courses simultaneously using multiple browser i
 """
 
 import os
-import time
+import re
 import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from queue import Queue
+from urllib.parse import urlparse
 
-# Global login lock to prevent concurrent login conflicts
-_login_lock = threading.Lock()
+from bs4 import BeautifulSoup
+
+from .exambase import ExambaseScraper
+from .logger import get_logger
+from .moodle import (
+    COURSE_FILE_LINK_SELECTOR,
+    DOWNLOAD_WORKERS,
+    HTML_PARSER,
+    PLUGINFILE_LINK_SELECTOR,
+    RESOURCE_PROBE_WORKERS,
+    VALID_SUFFIXES,
+    HKUMoodleScraper,
+    _existing_files,
+    _filename_from_url,
+)
+from .utils import LOGIN_LOCK as _login_lock
+
+# Course page links that lead to files; group 1 tells direct files from pages
+COURSE_FILE_HREF_RE = re.compile(r"/(pluginfile\.php|mod/(?:resource|folder)/)")
 
 
 class ParallelMoodleDownloader:
     """
     Parallel downloader for Moodle courses
-    Creates multiple browser instances to download courses in parallel
+    One browser logs in; worker threads share its cookie session and fetch
+    course pages and files with plain HTTP requests
     """
 
     def __init__(self, username, password, headless=True, verbose=False, num_workers=2):
@@ -29,7 +50,7 @@ class ParallelMoodleDownloader:
             password: Password
             headless: Run browsers in headless mode
             verbose: Enable verbose logging
-            num_workers: Number of parallel browser instances (default: 2)
+            num_workers: Number of parallel download threads (default: 2)
         """
         self.username = username
         self.password = password
@@ -41,58 +62,54 @@ class ParallelMoodleDownloader:
         self.total_downloads = 0
         self.download_lock = threading.Lock()
 
+        # Resource/folder page URL -> (filename, URL) pairs parsed from it,
+        # shared by the workers for one download run
+        self._resource_links = {}
+
     def _log(self, message, force=False):
-        """Thread-safe logging"""
+        """Thread-safe logging (the logger tags each line with the thread name)"""
         if self.verbose or force:
-            print(f"[Thread-{threading.current_thread().name}] {message}")
+            get_logger().info(message, force=True)
 
     def _create_authenticated_driver(self):
         """
         Create a new browser instance and authenticate it
-        Returns authenticated driver
+        Returns the logged-in scraper whose session the workers share
 
         Uses global lock to prevent concurrent login conflicts
         """
-        from rag_scraper.moodle import HKUMoodleScraper
-
         # Create a new scraper instance for this thread
         scraper = HKUMoodleScraper(headless=self.headless, verbose=False)
 
-        # Login with lock to avoid conflicts
+        # Login with lock to avoid conflicts with other browsers logging in
         with _login_lock:
             self._log("Waiting for login lock...", force=True)
             scraper.connect_moodle(self.username, self.password)
             self._log("Login completed, releasing lock", force=True)
-            # Add small delay after login to avoid session conflicts
-            time.sleep(2)
 
         return scraper
 
-    def _download_worker(self, task_queue, results_queue, base_dir):
+    def _download_worker(self, scraper, task_queue, results_queue, base_dir):
         """
         Worker function that processes courses from the queue
 
         Args:
+            scraper: Logged-in HKUMoodleScraper shared by all workers
             task_queue: Queue containing (course_name, course_url) tuples
             results_queue: Queue to put results
             base_dir: Base directory for downloads
         """
         worker_id = threading.current_thread().name
-        scraper = None
         downloaded_count = 0
 
         try:
-            # Create authenticated browser for this worker
-            self._log(f"Worker {worker_id} starting, creating browser...", force=True)
-            scraper = self._create_authenticated_driver()
-            self._log(f"Worker {worker_id} authenticated successfully", force=True)
-
-            # Process courses from queue
-            while not task_queue.empty():
+            # Process courses from queue until this worker's None sentinel
+            while True:
+                task = task_queue.get()
+                if task is None:
+                    break
+                course_name, course_url = task
                 try:
-                    # Get task with timeout to avoid hanging
-                    course_name, course_url = task_queue.get(timeout=1)
-
                     self._log(f"Processing: {course_name}", force=True)
 
                     # Download this course using the scraper's logic
@@ -102,22 +119,11 @@ class ParallelMoodleDownloader:
 
                     downloaded_count += files_downloaded
 
-                    # Mark task as done
-                    task_queue.task_done()
-
                 except Exception as e:
-                    if "Empty" not in str(e):  # Ignore empty queue errors
-                        self._log(f"Error processing course: {str(e)}", force=True)
-                        import traceback
-
-                        traceback.print_exc()
+                    self._log(f"Error processing course: {str(e)}", force=True)
+                    traceback.print_exc()
 
         finally:
-            # Clean up browser
-            if scraper:
-                scraper.close()
-                self._log(f"Worker {worker_id} closed browser", force=True)
-
             # Report results
             results_queue.put(downloaded_count)
             self._log(
@@ -125,52 +131,76 @@ class ParallelMoodleDownloader:
                 force=True,
             )
 
+    def _parse_resource_links(self, response):
+        """
+        Extract document links from a fetched resource/folder page
+
+        Args:
+            response: requests.Response of the page
+
+        Returns:
+            tuple: (filename, URL) pairs in page order
+        """
+        page_links = []
+        sub_soup = BeautifulSoup(response.content, HTML_PARSER, from_encoding="utf-8")
+        for sub_link in sub_soup.select(PLUGINFILE_LINK_SELECTOR):
+            sub_href = sub_link.get("href", "")
+            if "/pluginfile.php" in sub_href:
+                if sub_href.startswith("/"):
+                    sub_href = f"https://moodle.hku.hk{sub_href}"
+
+                filename = _filename_from_url(sub_href)
+
+                if len(filename) >= 3 and filename.lower().endswith(VALID_SUFFIXES):
+                    self._log(f"      Found: {filename}")
+                    page_links.append((filename, sub_href))
+        return tuple(page_links)
+
     def _download_single_course(self, scraper, course_name, course_url, base_dir):
         """
         Download a single course using the scraper's existing logic
         This is extracted from HKUMoodleScraper.download_all_courses()
         """
-        from bs4 import BeautifulSoup
-        from urllib.parse import unquote
-        import requests
-
         # Special handling for NLP courses
         if "Natural language processing" in course_name or "NLP" in course_name.upper():
-            return scraper._download_nlp_course(base_dir, course_name)
+            nlp_files, _ = scraper._download_nlp_course(base_dir, course_name)
+            return nlp_files
 
         # Create course directory
         safe_course_name = scraper._sanitize_filename(course_name)
         course_dir = os.path.join(base_dir, safe_course_name)
 
-        if not os.path.exists(course_dir):
-            os.makedirs(course_dir)
-
-        # Track existing files
-        existing_files = set(f.lower() for f in os.listdir(course_dir))
-        downloaded_in_this_run = set()
+        os.makedirs(course_dir, exist_ok=True)
 
-        VALID_EXTENSIONS = {".pdf", ".doc", ".docx", ".ppt", ".pptx", ".txt", ".md"}
+        # Track existing files (lowercased names, empty leftovers excluded)
+        existing_files = _existing_files(course_dir)
 
         try:
-            # Navigate to course page
-            scraper.driver.get(course_url)
-            time.sleep(0.5)
-
-            # Get page source
-            page_source = scraper.driver.page_source
-            soup = BeautifulSoup(page_source, "html.parser")
-
-            # Get cookies for authenticated requests
-            selenium_cookies = scraper.driver.get_cookies()
-            session = requests.Session()
-            for cookie in selenium_cookies:
-                session.cookies.set(cookie["name"], cookie["value"])
-
-            download_links = []
-
-            # Find all resource and folder links
-            for link in soup.find_all("a", href=True):
+            # Authenticated requests go through the scraper's session: it holds
+            # the login cookies and keeps its connections alive for all workers
+            session = scraper._http
+
+            # Course pages are server-rendered, so they are fetched without the
+            # browser (WebDriver is not thread-safe). A redirect to the login
+            # page means the cookies went stale: refresh them once and retry
+            response = session.get(course_url, timeout=30)
+            if "/login/" in urlparse(response.url).path:
+                scraper._sync_cookies_from_selenium()
+                response = session.get(course_url, timeout=30)
+            response.raise_for_status()
+            soup = BeautifulSoup(response.content, HTML_PARSER, from_encoding="utf-8")
+
+            # Lowercased filename -> (filename, URL); the first link to a name wins
+            download_links = {}
+            resource_pages = []  # (href, text) of resource/folder pages to fetch
+
+            # Find all resource and folder links (only anchors that can lead
+            # to files are matched, not every link on the page)
+            for link in soup.select(COURSE_FILE_LINK_SELECTOR):
                 href = link.get("href", "")
+                match = COURSE_FILE_HREF_RE.search(href)
+                if not match:
+                    continue
                 text = link.get_text(strip=True)
 
                 # Make absolute URL
@@ -178,106 +208,112 @@ class ParallelMoodleDownloader:
                     href = f"https://moodle.hku.hk{href}"
 
                 # Case 1: Direct pluginfile.php links
-                if "/pluginfile.php" in href:
-                    filename = href.split("/")[-1].split("?")[0]
-                    filename = unquote(filename)
-
-                    if filename and len(filename) >= 3:
-                        ext = os.path.splitext(filename)[1].lower()
-                        if ext in VALID_EXTENSIONS:
-                            self._log(f"    Checking: {text}")
-                            self._log(f"      Found direct file: {filename}")
-                            download_links.append((filename, href))
-
-                # Case 2: Resource/folder pages - need to fetch and extract
-                elif "/mod/resource/" in href or "/mod/folder/" in href:
-                    self._log(f"    Checking: {text}")
-                    try:
-                        response = session.get(href, timeout=5)
-                        if response.status_code == 200:
-                            sub_soup = BeautifulSoup(response.text, "html.parser")
-                            for sub_link in sub_soup.find_all("a", href=True):
-                                sub_href = sub_link.get("href", "")
-                                if "/pluginfile.php" in sub_href:
-                                    if sub_href.startswith("/"):
-                                        sub_href = f"https://moodle.hku.hk{sub_href}"
-
-                                    filename = sub_href.split("/")[-1].split("?")[0]
-                                    filename = unquote(filename)
-
-                                    if filename and len(filename) >= 3:
-                                        ext = os.path.splitext(filename)[1].lower()
-                                        if ext in VALID_EXTENSIONS:
-                                            self._log(f"      Found: {filename}")
-                                            download_links.append((filename, sub_href))
-                    except Exception as e:
-                        self._log(f"      Error fetching resource page: {str(e)}")
-
-            # Remove duplicates
-            unique_links = {}
-            for filename, url in download_links:
-                if filename.lower() not in unique_links:
-                    unique_links[filename.lower()] = (filename, url)
-
-            download_links = list(unique_links.values())
+                if match.group(1) == "pluginfile.php":
+                    # Same naming as the sequential path, so existing-file
+                    # and ETag lookups agree
+                    filename = _filename_from_url(href)
+                    filename_lower = filename.lower()
+
+                    if len(filename) >= 3 and filename_lower.endswith(VALID_SUFFIXES):
+                        self._log(f"    Checking: {text}")
+                        self._log(f"      Found direct file: {filename}")
+                        download_links.setdefault(filename_lower, (filename, href))
+
+                # Case 2: Resource/folder pages - fetched and extracted below
+                else:
+                    resource_pages.append((href, text))
+
+            def fetch_page(page):
+                try:
+                    return session.get(page[0], timeout=5), None
+                except Exception as e:
+                    return None, e
+
+            # Pages already parsed in this run (linked twice, or from another
+            # course) are not fetched again
+            pages_to_fetch = list(
+                {
+                    href: text
+                    for href, text in resource_pages
+                    if href not in self._resource_links
+                }.items()
+            )
+
+            # The page fetches are independent and latency-bound, so run them
+            # concurrently; parsing stays on this thread, in page order
+            # Every worker shares the scraper's connection pool, so the probe
+            # and download budgets are split between them
+            with ThreadPoolExecutor(
+                max_workers=max(1, RESOURCE_PROBE_WORKERS // self.num_workers)
+            ) as executor:
+                fetched = list(executor.map(fetch_page, pages_to_fetch))
+
+            for (href, text), (response, error) in zip(pages_to_fetch, fetched):
+                self._log(f"    Checking: {text}")
+                if error is not None:
+                    self._log(f"      Error fetching resource page: {str(error)}")
+                    continue
+                if response.status_code != 200:
+                    continue
+                self._resource_links[href] = self._parse_resource_links(response)
+
+            for href, _ in resource_pages:
+                for filename, sub_href in self._resource_links.get(href, ()):
+                    download_links.setdefault(filename.lower(), (filename, sub_href))
+
+            download_links = list(download_links.values())
 
             self._log(f"Found {len(download_links)} downloadable files")
 
-            # Download files
-            new_downloads = 0
+            # Skip files already on disk, then download the rest concurrently on
+            # the scraper's bounded pool (each file streamed to a .partial file)
+            pending = []
             for idx, (filename, url) in enumerate(download_links, 1):
-                filepath = os.path.join(course_dir, filename)
-                filename_lower = filename.lower()
-
-                # Check if already exists
-                if (
-                    filename_lower in existing_files
-                    or filename_lower in downloaded_in_this_run
-                ):
+                if filename.lower() in existing_files:
                     self._log(
                         f"  [{idx}/{len(download_links)}] {filename} - Already exists"
                     )
                     continue
-
-                # Download
-                self._log(f"  [{idx}/{len(download_links)}] Downloading: {filename}")
-                try:
-                    response = session.get(url, timeout=30)
-                    if response.status_code == 200:
-                        with open(filepath, "wb") as f:
-                            f.write(response.content)
-                        self._log(f"      ✓ Downloaded")
-                        downloaded_in_this_run.add(filename_lower)
-                        new_downloads += 1
-                    else:
-                        self._log(f"      ✗ Failed: HTTP {response.status_code}")
-                except Exception as e:
-                    self._log(f"      ✗ Error: {str(e)}")
+                pending.append((f"{idx}/{len(download_links)}", filename, url))
+
+            new_downloads = len(
+                scraper._download_files_parallel(
+                    pending,
+                    course_dir,
+                    max_workers=max(1, DOWNLOAD_WORKERS // self.num_workers),
+                )
+            )
 
             self._log(f"  ✓ Completed: {course_name} ({new_downloads} new files)")
             return new_downloads
 
         except Exception as e:
             self._log(f"  ✗ Error processing {course_name}: {str(e)}")
-            import traceback
-
             traceback.print_exc()
             return 0
 
-    def download_all_courses_parallel(self, course_urls, base_dir="knowledge_base"):
+    def download_all_courses_parallel(
+        self, course_urls, base_dir="knowledge_base", scraper=None
+    ):
         """
-        Download all courses in parallel using multiple browser instances
+        Download all courses in parallel on worker threads sharing one login
 
         Args:
             course_urls: Dict of {course_name: course_url}
             base_dir: Base directory for downloads
+            scraper: Already logged-in HKUMoodleScraper to share (owned by the
+                caller); a new one is logged in and closed here if omitted
 
         Returns:
             Total number of files downloaded
         """
-        print(f"\n{'='*50}")
-        print(f"Starting PARALLEL download with {self.num_workers} workers...")
-        print(f"{'='*50}\n")
+        # Through the logger, not print(), so the banner stays in order with
+        # the workers' lines (the logger writes on its own thread)
+        self._log("=" * 50, force=True)
+        self._log(
+            f"Starting PARALLEL download with {self.num_workers} workers...", force=True
+        )
+        self._log("=" * 50, force=True)
 
         # Create base directory
         if not os.path.exists(base_dir):
@@ -287,39 +323,54 @@ class ParallelMoodleDownloader:
         task_queue = Queue()
         for course_name, course_url in course_urls.items():
             task_queue.put((course_name, course_url))
+        # One sentinel per worker ends its loop once the courses run out
+        for _ in range(self.num_workers):
+            task_queue.put(None)
 
         # Create results queue
         results_queue = Queue()
+        self._resource_links = {}
+
+        # One login feeds every worker; the browser is only used again to
+        # refresh cookies
+        owns_scraper = scraper is None
+        if owns_scraper:
+            try:
+                scraper = self._create_authenticated_driver()
+            except Exception as e:
+                self._log(f"Login failed: {str(e)}", force=True)
+                return 0
 
-        # Start worker threads
-        threads = []
-        for i in range(self.num_workers):
-            thread = threading.Thread(
-                target=self._download_worker,
-                args=(task_queue, results_queue, base_dir),
-                name=f"Worker-{i+1}",
-            )
-            thread.daemon = True
-            thread.start()
-            threads.append(thread)
-
-        # Wait for all tasks to complete
-        task_queue.join()
-
-        # Wait for all threads to finish
-        for thread in threads:
-            thread.join(timeout=5)
+        try:
+            # Start worker threads
+            threads = []
+            for i in range(self.num_workers):
+                thread = threading.Thread(
+                    target=self._download_worker,
+                    args=(scraper, task_queue, results_queue, base_dir),
+                    name=f"Worker-{i+1}",
+                )
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+
+            # Wait for all workers to finish: each exits at its sentinel
+            for thread in threads:
+                thread.join()
+        finally:
+            if owns_scraper:
+                scraper.close()
 
         # Collect results
         total_downloads = 0
         while not results_queue.empty():
             total_downloads += results_queue.get()
 
-        print(f"\n{'='*50}")
-        print(f"Parallel download completed!")
-        print(f"Total files downloaded: {total_downloads}")
-        print(f"Saved to: {os.path.abspath(base_dir)}")
-        print(f"{'='*50}\n")
+        self._log("=" * 50, force=True)
+        self._log("Parallel download completed!", force=True)
+        self._log(f"Total files downloaded: {total_downloads}", force=True)
+        self._log(f"Saved to: {os.path.abspath(base_dir)}", force=True)
+        self._log("=" * 50, force=True)
 
         return total_downloads
 
@@ -349,31 +400,58 @@ class ParallelExambaseDownloader:
         self.verbose = verbose
         self.num_workers = num_workers
 
+        # The first worker to log in goes through SSO and caches the cookies;
+        # the others wait for it, then restore that session concurrently
+        self._login_done = threading.Event()
+        self._login_leader = None  # thread name of the worker doing the SSO login
+        self._leader_logged_in = False
+
     def _log(self, message, force=False):
-        """Thread-safe logging"""
+        """Thread-safe logging (the logger tags each line with the thread name)"""
         if self.verbose or force:
-            print(f"[Thread-{threading.current_thread().name}] {message}")
+            get_logger().info(message, force=True)
 
     def _create_authenticated_driver(self):
         """
         Create and authenticate a new browser instance
-        Uses global lock to prevent concurrent login conflicts
-        """
-        from rag_scraper.exambase import ExambaseScraper
 
+        Only one worker logs in through the SSO form; the rest restore the
+        session it caches, concurrently. A worker whose cached session does
+        not work falls back to a full login, one at a time under the global
+        login lock.
+        """
         scraper = ExambaseScraper(
             self.username, self.password, headless=self.headless, verbose=False
         )
 
-        # Login with lock to avoid conflicts
+        worker_id = threading.current_thread().name
         with _login_lock:
-            self._log("Waiting for login lock...", force=True)
-            if not scraper.login():
-                raise Exception("Failed to login to Exambase")
-            self._log("Login completed, releasing lock", force=True)
-            # Add small delay after login to avoid session conflicts
-            time.sleep(2)
+            if self._login_leader is None:
+                self._login_leader = worker_id
+        is_leader = self._login_leader == worker_id
+
+        try:
+            if is_leader:
+                logged_in = scraper.login()
+                self._leader_logged_in = logged_in
+                if logged_in:
+                    self._log("Login completed, session cached", force=True)
+            else:
+                self._log("Waiting for first login...", force=True)
+                self._login_done.wait()
+                logged_in = self._leader_logged_in and scraper._try_cookie_login()
+                if logged_in:
+                    scraper._finish_login()
+                else:
+                    with _login_lock:
+                        logged_in = scraper.login()
+        finally:
+            if is_leader:
+                self._login_done.set()
 
+        if not logged_in:
+            scraper.close()
+            raise Exception("Failed to login to Exambase")
         return scraper
 
     def _download_worker(self, task_queue, results_queue, course_mapping):
@@ -395,23 +473,25 @@ class ParallelExambaseDownloader:
             scraper = self._create_authenticated_driver()
             self._log(f"Worker {worker_id} authenticated", force=True)
 
-            # Process courses
-            while not task_queue.empty():
+            # Process courses until this worker's None sentinel
+            while True:
+                course_code = task_queue.get()
+                if course_code is None:
+                    break
                 try:
-                    course_code = task_queue.get(timeout=1)
                     course_dirs = course_mapping[course_code]
 
                     self._log(f"[Searching] {course_code}", force=True)
 
-                    # Use scraper's existing logic to download
-                    downloads = scraper._search_and_download_course(course_code, course_dirs)
+                    # Same per-course path as the pooled scraper (correlation
+                    # ids, search pacing)
+                    _, downloads, _ = scraper._process_course_code(
+                        course_code, course_dirs
+                    )
                     total_downloads += downloads
 
-                    task_queue.task_done()
-
                 except Exception as e:
-                    if "Empty" not in str(e):
-                        self._log(f"Error: {str(e)}", force=True)
+                    self._log(f"Error: {str(e)}", force=True)
 
         finally:
             if scraper:
@@ -433,14 +513,20 @@ class ParallelExambaseDownloader:
         Returns:
             Dict with download statistics
         """
-        print(f"\n{'='*50}")
-        print(f"Starting PARALLEL Exambase download with {self.num_workers} workers...")
-        print(f"{'='*50}\n")
+        self._log("=" * 50, force=True)
+        self._log(
+            f"Starting PARALLEL Exambase download with {self.num_workers} workers...",
+            force=True,
+        )
+        self._log("=" * 50, force=True)
 
         # Create task queue
         task_queue = Queue()
         for course_code in course_mapping.keys():
             task_queue.put(course_code)
+        # One sentinel per worker ends its loop once the courses run out
+        for _ in range(self.num_workers):
+            task_queue.put(None)
 
         # Create results queue
         results_queue = Queue()
@@ -457,11 +543,9 @@ class ParallelExambaseDownloader:
             thread.start()
             threads.append(thread)
 
-        # Wait for completion
-        task_queue.join()
-
+        # Wait for completion (each worker exits at its sentinel)
         for thread in threads:
-            thread.join(timeout=5)
+            thread.join()
 
         # Collect results
         total_downloads = 0
@@ -473,3 +557,89 @@ class ParallelExambaseDownloader:
             "total_courses": len(course_mapping),
             "courses_with_exams": len([c for c in course_mapping if course_mapping[c]]),
         }
+
+
+# Restart a pooled browser after this many courses to avoid ChromeDriver memory creep
+MAX_USES_PER_INSTANCE = 50
+
+
+class ExambaseBrowserPool:
+    """
+    Pool of logged-in Exambase scrapers shared by worker threads
+    The caller's scraper is reused as the first instance; the rest are created and
+    logged in up front (cached cookies make each extra login cheap)
+    """
+
+    def __init__(self, seed, size):
+        """
+        Initialize browser pool
+
+        Args:
+            seed: Already logged-in ExambaseScraper owned by the caller
+            size: Desired number of browser instances (including seed)
+        """
+        self.seed = seed
+        self._idle = Queue()
+        self._members = [seed]
+        self._idle.put([seed, 0])
+
+        if size > 1:
+            with ThreadPoolExecutor(max_workers=size - 1) as executor:
+                for scraper in executor.map(lambda _: self._spawn(), range(size - 1)):
+                    if scraper is not None:
+                        self._members.append(scraper)
+                        self._idle.put([scraper, 0])
+
+        self.size = len(self._members)
+
+    def _spawn(self):
+        """Create and log in one extra scraper, or return None on failure"""
+        scraper = None
+        try:
+            scraper = type(self.seed)(
+                self.seed.username,
+                self.seed.password,
+                headless=self.seed.headless,
+                verbose=self.seed.verbose,
+            )
+            with _login_lock:
+                if scraper.login():
+                    return scraper
+        except Exception as e:
+            self.seed._log(f"Could not start pooled browser: {e}")
+        if scraper:
+            scraper.close()
+        return None
+
+    def _recycle(self, scraper):
+        """Restart a worn-out browser in place and log it in again"""
+        self.seed._log("Recycling pooled browser...")
+        try:
+            scraper.driver.quit()
+        except Exception:
+            pass
+        scraper._initialize_driver()
+        with _login_lock:
+            scraper.login()
+
+    def run(self, func, *args):
+        """
+        Run func(scraper, *args) on the next idle browser
+
+        Blocks until a browser is free; the browser is returned to the pool afterwards
+        """
+        entry = self._idle.get()
+        try:
+            if entry[1] >= MAX_USES_PER_INSTANCE:
+                self._recycle(entry[0])
+                entry[1] = 0
+            entry[1] += 1
+            return func(entry[0], *args)
+        finally:
+            self._idle.put(entry)
+
+    def close(self):
+        """Close every pooled browser except the caller's seed scraper"""
+        for scraper in self._members:
+            if scraper is not self.seed:
+                scraper.close()
@@ -11,6 +11,7 @@ import threading
 from .moodle import HKUMoodleScraper
 from .exambase import ExambaseScraper
 from .logger import get_logger
+from .utils import sanitize_filename
 
 
 class RAGScraper:
@@ -288,9 +289,7 @@ class RAGScraper:
                 force=True,
             )
 
-            scraper.close()
-
-            # Use parallel downloader
+            # Use parallel downloader; the workers share this scraper's login
             download_start = time.time()
             parallel_downloader = ParallelMoodleDownloader(
                 self.email,
@@ -300,9 +299,12 @@ class RAGScraper:
                 num_workers=self.parallel_workers,
             )
 
-            downloaded_files = parallel_downloader.download_all_courses_parallel(
-                course_urls, base_dir="knowledge_base"
-            )
+            try:
+                downloaded_files = parallel_downloader.download_all_courses_parallel(
+                    course_urls, base_dir="knowledge_base", scraper=scraper
+                )
+            finally:
+                scraper.close()
             download_time = time.time() - download_start
 
             stats = {
@@ -481,8 +483,7 @@ class RAGScraper:
                     if match:
                         course_code = match.group(1)
                         # Use sanitized course name as folder name
-                        scraper_temp = HKUMoodleScraper(headless=True, verbose=False)
-                        folder_name = scraper_temp._sanitize_filename(course_name)
+                        folder_name = sanitize_filename(course_name)
                         course_list.append((course_code, folder_name))
 
                 if not course_list:
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared helpers for RAG Scraper
+Functions used by both the Moodle and Exambase scrapers (no browser needed)
+"""
+
+import json
+import os
+import threading
+from functools import lru_cache
+
+# One SSO login at a time per process: concurrent logins of the same account
+# (parallel workers, pooled browsers) invalidate each other's sessions
+LOGIN_LOCK = threading.Lock()
+
+# Characters not allowed in file/folder names on common filesystems
+_INVALID_CHARS_TABLE = str.maketrans({char: "_" for char in '<>:"/\\|?*'})
+
+
+@lru_cache(maxsize=1024)
+def sanitize_filename(filename):
+    """
+    Sanitize filename for filesystem compatibility
+
+    Memoized, since the same course names are sanitized by every scraper step.
+
+    Args:
+        filename (str): Original filename
+
+    Returns:
+        str: Sanitized filename
+    """
+    # Replace invalid characters and limit length
+    return filename.translate(_INVALID_CHARS_TABLE)[:200].strip()
+
+
+def write_private_json(path, data):
+    """
+    Write data as JSON to a file only the current user can read (mode 0o600)
+
+    Used for cached session cookies. The file is written under a temporary
+    name created with the private mode, then renamed over path, so the
+    cookies are never readable by others, not even half-written.
+
+    Args:
+        path (str): Destination file; its directory is created if missing
+        data: JSON-serialisable value
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        os.remove(tmp_path)  # a leftover may have been created with other modes
+    except FileNotFoundError:
+        pass
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+test_exambase_parsing.py - Tests for the Exambase result-page parsing and exam filenames
+"""
+
+import os
+import random
+import re
+import sys
+
+import pytest
+
+pytest.importorskip("selenium")
+pytest.importorskip("bs4")
+pytest.importorskip("requests")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_scraper import exambase
+
+# _title_to_filename before it gained the ASCII fast path
+OLD_NONWORD = re.compile(r"[^\w\s-]")
+OLD_SPACE = re.compile(r"\s+")
+
+# ASCII punctuation and every ASCII whitespace character (\x1c-\x1f count as
+# whitespace for both str.isspace() and re's \s), plus a few non-ASCII letters,
+# spaces and symbols
+TITLE_ALPHABET = (
+    "abcXYZ019_-"
+    + "!\"#$%&'()*+,./:;<=>?@[\\]^`{|}~"
+    + " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+    + "é數據　\xa0–™"
+)
+
+BASE_URL = "https://exambase-lib-hku-hk.eproxy.lib.hku.hk/exhibits/show/exam/search"
+
+RESULTS_HTML = """
+<html><body><table>
+<tr><td class="evenResultDetail">
+  <a href="/archive/files/comp7103_2023.pdf">COMP7103 Data mining</a><br>
+  Exam date: 2023-12-05<br>Remark: Paper 1
+</td></tr>
+<tr><td class="oddResultDetail">
+  <a href="https://exambase-lib-hku-hk.eproxy.lib.hku.hk/archive/files/x.pdf">
+    COMP7103  <b>Data</b> mining (Resit)</a>
+  <br/>Exam date: 2024-05-20
+</td></tr>
+<tr><td class="evenResultDetail">No paper for this year</td></tr>
+</table></body></html>
+"""
+
+
+def old_title_to_filename(title):
+    return OLD_SPACE.sub("_", OLD_NONWORD.sub("", title))
+
+
+@pytest.mark.parametrize(
+    "title",
+    ["Data mining!", " leading", "trailing ", "   ", "", "a - b", "數據 挖掘", "x\x1fy"],
+)
+def test_title_to_filename_edge_cases(title):
+    assert exambase._title_to_filename(title) == old_title_to_filename(title)
+
+
+def test_title_to_filename_matches_old_regexes():
+    rng = random.Random(7103)
+    for _ in range(20000):
+        title = "".join(
+            rng.choice(TITLE_ALPHABET) for _ in range(rng.randint(0, 24))
+        )
+        assert exambase._title_to_filename(title) == old_title_to_filename(title), repr(
+            title
+        )
+
+
+@pytest.fixture
+def soup_only(monkeypatch):
+    """Force the BeautifulSoup parsing path"""
+    monkeypatch.setattr(exambase, "HTMLParser", None)
+
+
+def test_parse_results_html(soup_only):
+    rows = exambase._parse_results_html(RESULTS_HTML, BASE_URL)
+
+    assert [row["url"] for row in rows] == [
+        "https://exambase-lib-hku-hk.eproxy.lib.hku.hk/archive/files/comp7103_2023.pdf",
+        "https://exambase-lib-hku-hk.eproxy.lib.hku.hk/archive/files/x.pdf",
+    ]
+    assert rows[0]["title"] == "COMP7103 Data mining"
+    assert "Exam date: 2023-12-05\n" in rows[0]["full_text"]
+
+
+@pytest.mark.parametrize(
+    "html, expected",
+    [
+        ("<html><body>Total number of hits is 0</body></html>", []),
+        ("<html><body>Please log in</body></html>", None),
+    ],
+)
+def test_parse_results_html_without_results(soup_only, html, expected):
+    assert exambase._parse_results_html(html, BASE_URL) == expected
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        RESULTS_HTML,
+        "<html><body>Total number of hits is 0</body></html>",
+        "<html><body>Please log in</body></html>",
+    ],
+)
+def test_selectolax_parser_matches_beautifulsoup(monkeypatch, html):
+    if exambase.HTMLParser is None:
+        pytest.skip("selectolax.parser is not available")
+    fast = exambase._parse_results_selectolax(html, BASE_URL)
+    monkeypatch.setattr(exambase, "HTMLParser", None)
+    assert fast == exambase._parse_results_html(html, BASE_URL)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+test_moodle_helpers.py - Tests for the Moodle scraper's HTML parsing and file downloads (no browser)
+"""
+
+import io
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("selenium")
+pytest.importorskip("webdriver_manager")
+pytest.importorskip("bs4")
+pytest.importorskip("requests")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bs4 import BeautifulSoup
+from rag_scraper import moodle
+from rag_scraper.moodle import HKUMoodleScraper
+
+MY_COURSES_HTML = """
+<html><head><title>My courses</title></head><body>
+<div class="card-deck">
+  <div class="card">
+    <a href="https://moodle.hku.hk/course/view.php?id=123">
+      <span class="sr-only">Course name</span>
+      COMP7103 Data mining <small>[Section 1A, 2025]</small>
+    </a>
+    <a href="https://moodle.hku.hk/course/view.php?id=123">Course is starred COMP7103</a>
+    <a href="https://moodle.hku.hk/course/view.php?id=123">View</a>
+  </div>
+  <div class="card">
+    <a href="/course/view.php?id=456&amp;section=2">COMP7607 Natural language processing</a>
+    <a href="/course/view.php?id=456&amp;section=2">COMP7607 Natural language processing</a>
+  </div>
+  <a href="https://moodle.hku.hk/user/profile.php?id=9">Profile of a student</a>
+</div>
+</body></html>
+"""
+
+
+def make_scraper(session=None):
+    """HKUMoodleScraper without a browser: only what the helpers touch"""
+    scraper = HKUMoodleScraper.__new__(HKUMoodleScraper)
+    scraper.verbose = False
+    scraper._http = session
+    scraper._sync_cookies_from_selenium = lambda: None
+    return scraper
+
+
+def test_extract_courses():
+    courses = make_scraper().extract_courses(MY_COURSES_HTML)
+
+    assert courses == [
+        {
+            "course_name": "Course name COMP7103 Data mining [Section 1A, 2025]",
+            "course_id": 123,
+        },
+        {"course_name": "COMP7607 Natural language processing", "course_id": 456},
+    ]
+
+
+def test_extract_courses_without_course_links():
+    html = "<html><body><a href='/login/index.php'>Log in to Moodle</a></body></html>"
+    assert make_scraper().extract_courses(html) == []
+
+
+@pytest.mark.parametrize(
+    "selector, strainer",
+    [
+        (moodle.COURSE_LINK_SELECTOR, moodle.COURSE_LINK_STRAINER),
+        ("a[href]", moodle.LINK_STRAINER),
+    ],
+)
+def test_select_links_matches_get_text(monkeypatch, selector, strainer):
+    monkeypatch.setattr(moodle, "HTMLParser", None)
+    expected = [
+        (link.get_text(" ", strip=True), link["href"])
+        for link in BeautifulSoup(MY_COURSES_HTML, "html.parser").select(selector)
+    ]
+    assert moodle._select_links(MY_COURSES_HTML, selector, strainer) == expected
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        MY_COURSES_HTML,
+        "<a href='x'>  one <b> two </b>\n\n<i>   </i>three  </a>",
+        "<a href='x'></a><a href='y'>   </a>",
+    ],
+)
+def test_node_text_matches_get_text(html):
+    if moodle.HTMLParser is None:
+        pytest.skip("selectolax.parser is not available")
+    fast = [
+        (moodle._node_text(node), node.attributes.get("href") or "")
+        for node in moodle.HTMLParser(html).css("a[href]")
+    ]
+    expected = [
+        (link.get_text(" ", strip=True), link["href"])
+        for link in BeautifulSoup(html, "html.parser").select("a[href]")
+    ]
+    assert fast == expected
+
+
+class FakeRaw(io.BytesIO):
+    """response.raw stand-in; fail_after cuts the body off like a dropped connection"""
+
+    def __init__(self, body, fail_after=None):
+        super().__init__(body)
+        self.decode_content = False
+        self.fail_after = fail_after
+
+    def read(self, size=-1):
+        if self.fail_after is not None and self.tell() >= self.fail_after:
+            raise OSError("connection reset")
+        if self.fail_after is not None:
+            remaining = self.fail_after - self.tell()
+            size = remaining if size < 0 else min(size, remaining)
+        return super().read(size)
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=b"", headers=None, fail_after=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = headers or {}
+        self.raw = FakeRaw(body, fail_after)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise moodle.requests.HTTPError(f"{self.status_code} error")
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeSession:
+    """Serves GET/HEAD from per-URL responses and records the HEAD headers"""
+
+    def __init__(self, gets=None, heads=None):
+        self.gets = gets or {}
+        self.heads = heads or {}
+        self.head_headers = []
+        self.get_kwargs = []
+        self.cookies = moodle.requests.cookies.RequestsCookieJar()
+
+    def get(self, url, **kwargs):
+        self.get_kwargs.append(kwargs)
+        return self.gets[url]
+
+    def head(self, url, headers=None, **kwargs):
+        self.head_headers.append(headers)
+        return self.heads[url]
+
+
+def test_download_file_safe_renames_partial_and_records_etag(tmp_path):
+    url = "https://moodle.hku.hk/pluginfile.php/1/lecture1.pdf"
+    session = FakeSession(
+        gets={url: FakeResponse(body=b"%PDF-1.7 slides", headers={"ETag": '"v1"'})}
+    )
+    etags = {}
+    target = tmp_path / "lecture1.pdf"
+
+    assert make_scraper(session)._download_file_safe(url, str(target), etags)
+
+    assert target.read_bytes() == b"%PDF-1.7 slides"
+    assert not (tmp_path / ("lecture1.pdf" + moodle.PARTIAL_SUFFIX)).exists()
+    assert etags == {"lecture1.pdf": '"v1"'}
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        FakeResponse(body=b"%PDF-1.7 slides", fail_after=4),
+        FakeResponse(status_code=404),
+    ],
+)
+def test_download_file_safe_leaves_nothing_on_failure(tmp_path, response):
+    url = "https://moodle.hku.hk/pluginfile.php/1/lecture1.pdf"
+    etags = {}
+    target = tmp_path / "lecture1.pdf"
+
+    ok = make_scraper(FakeSession(gets={url: response}))._download_file_safe(
+        url, str(target), etags
+    )
+
+    assert not ok
+    assert os.listdir(tmp_path) == []
+    assert etags == {}
+
+
+def test_download_files_parallel_skips_unchanged_files(tmp_path):
+    unchanged = "https://moodle.hku.hk/pluginfile.php/1/old.pdf"
+    changed = "https://moodle.hku.hk/pluginfile.php/1/new.pdf"
+    (tmp_path / moodle.ETAG_FILE).write_text(
+        json.dumps({"old.pdf": '"a"', "new.pdf": '"b"'}), encoding="utf-8"
+    )
+    session = FakeSession(
+        gets={changed: FakeResponse(body=b"new", headers={"ETag": '"c"'})},
+        heads={unchanged: FakeResponse(status_code=304), changed: FakeResponse()},
+    )
+    pending = [("1/2", "old.pdf", unchanged), ("2/2", "new.pdf", changed)]
+
+    paths = make_scraper(session)._download_files_parallel(
+        pending, str(tmp_path), max_workers=1
+    )
+
+    assert paths == [str(tmp_path / "new.pdf")]
+    assert not (tmp_path / "old.pdf").exists()
+    assert {"If-None-Match": '"a"'} in session.head_headers
+    assert json.loads((tmp_path / moodle.ETAG_FILE).read_text(encoding="utf-8")) == {
+        "old.pdf": '"a"',
+        "new.pdf": '"c"',
+    }
+
+
+@pytest.mark.parametrize(
+    "response, restored",
+    [
+        (FakeResponse(status_code=200), True),
+        # Expired session: Moodle redirects to its login page, then to CAS/ADFS
+        (
+            FakeResponse(
+                status_code=303,
+                headers={"Location": "https://moodle.hku.hk/login/index.php"},
+            ),
+            False,
+        ),
+        (
+            FakeResponse(
+                status_code=302,
+                headers={"Location": "https://adfs.hku.hk/adfs/ls/?SAMLRequest=x"},
+            ),
+            False,
+        ),
+    ],
+)
+def test_restore_session_requires_moodle_page(response, restored):
+    session = FakeSession(gets={f"{moodle.MOODLE_URL}/my/courses.php": response})
+    scraper = make_scraper(session)
+    scraper._load_cookies = lambda: [
+        {"name": "MoodleSession", "value": "abc", "domain": "moodle.hku.hk"}
+    ]
+    synced = []
+    scraper._sync_cookies_to_selenium = lambda: synced.append(True)
+
+    assert scraper._restore_session() is restored
+
+    assert session.get_kwargs[0]["allow_redirects"] is False
+    assert bool(synced) is restored
+    assert bool(len(session.cookies)) is restored
+
+
+def test_existing_files_ignores_empty_leftovers(tmp_path):
+    (tmp_path / "Lecture1.pdf").write_bytes(b"%PDF")
+    (tmp_path / "lecture2.pdf").write_bytes(b"")
+    (tmp_path / "folder.pdf").mkdir()
+
+    existing = moodle._existing_files(str(tmp_path))
+
+    assert "lecture1.pdf" in existing
+    assert "lecture2.pdf" not in existing
+    assert "folder.pdf" not in existing
+    assert "missing.pdf" not in existing
+    existing.add("missing.pdf")
+    assert "missing.pdf" in existing
+
+
+def test_download_files_parallel_refetches_empty_leftovers(tmp_path):
+    url = "https://moodle.hku.hk/pluginfile.php/1/old.pdf"
+    (tmp_path / "old.pdf").write_bytes(b"")
+    (tmp_path / moodle.ETAG_FILE).write_text(
+        json.dumps({"old.pdf": '"a"'}), encoding="utf-8"
+    )
+    # A HEAD would answer 304, but the empty file must not be trusted
+    session = FakeSession(
+        gets={url: FakeResponse(body=b"slides", headers={"ETag": '"a"'})},
+        heads={url: FakeResponse(status_code=304)},
+    )
+
+    paths = make_scraper(session)._download_files_parallel(
+        [("1/1", "old.pdf", url)], str(tmp_path), max_workers=1
+    )
+
+    assert paths == [str(tmp_path / "old.pdf")]
+    assert (tmp_path / "old.pdf").read_bytes() == b"slides"
+    assert session.head_headers == []
+
+
+class FakeDriver:
+    def __init__(self):
+        self.cdp_commands = []
+        self.quit_called = False
+
+    def execute_cdp_cmd(self, command, params):
+        self.cdp_commands.append(command)
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_release_driver_clears_state_and_shares_one_reaper():
+    moodle.shutdown_driver_pool()
+    drivers = [FakeDriver() for _ in range(moodle.DRIVER_POOL_SIZE + 1)]
+    try:
+        released = []
+        for driver in drivers:
+            scraper = make_scraper()
+            scraper.headless = True
+            scraper.driver = driver
+            released.append(scraper._release_driver())
+
+        # The pool is full after DRIVER_POOL_SIZE browsers; the next one is quit
+        assert released == [True] * moodle.DRIVER_POOL_SIZE + [False]
+        assert drivers[-1].quit_called
+        assert {
+            "Network.clearBrowserCookies",
+            "Network.clearBrowserCache",
+            "Storage.clearDataForOrigin",
+        } <= set(drivers[0].cdp_commands)
+        reapers = [
+            t for t in threading.enumerate() if t.name == "DriverPoolReaper"
+        ]
+        assert len(reapers) == 1
+    finally:
+        moodle.shutdown_driver_pool()
+    assert all(driver.quit_called for driver in drivers)
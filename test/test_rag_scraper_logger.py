@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+test_rag_scraper_logger.py - Tests for RAGLogger's writer thread and close()
+"""
+
+import os
+import sys
+import threading
+
+# logger.py has no third-party imports; load it without the package __init__,
+# which pulls in Selenium
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rag_scraper"),
+)
+from logger import RAGLogger
+
+
+def logged_messages(log_file):
+    with open(log_file, encoding="utf-8") as f:
+        return [line.rsplit("] ", 1)[-1].rstrip("\n") for line in f if "[INFO]" in line]
+
+
+def test_messages_after_close_are_written(tmp_path, capsys):
+    log_file = str(tmp_path / "rag_scraper.log")
+    logger = RAGLogger(log_file=log_file, verbose=True)
+
+    logger.info("before close")
+    logger.close()
+    logger.info("after close")
+    logger.close()
+
+    assert logged_messages(log_file) == ["before close", "after close"]
+    assert "after close" in capsys.readouterr().out
+
+
+def test_close_while_logging_loses_nothing(tmp_path, capsys):
+    log_file = str(tmp_path / "rag_scraper.log")
+    logger = RAGLogger(log_file=log_file, verbose=True)
+
+    def work(worker):
+        for i in range(2000):
+            logger.info(f"w{worker} {i}")
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    logger.close()
+    for thread in threads:
+        thread.join()
+
+    assert len(logged_messages(log_file)) == 4 * 2000
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+test_rag_scraper_utils.py - Tests for the browser-free helpers in rag_scraper/utils.py
+"""
+
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+# utils.py has no third-party imports; load it without the package __init__,
+# which pulls in Selenium
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rag_scraper"),
+)
+from utils import sanitize_filename, write_private_json
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("COMP7103 Data mining", "COMP7103 Data mining"),
+        ('a<b>c:d"e/f\\g|h?i*j', "a_b_c_d_e_f_g_h_i_j"),
+        ("  padded name  ", "padded name"),
+        ("數據挖掘 Lecture 1.pdf", "數據挖掘 Lecture 1.pdf"),
+        ("", ""),
+    ],
+)
+def test_sanitize_filename(name, expected):
+    assert sanitize_filename(name) == expected
+
+
+def test_sanitize_filename_limits_length_before_stripping():
+    name = "x" * 199 + " " + "y" * 50
+    assert sanitize_filename(name) == "x" * 199
+
+
+def test_write_private_json_is_owner_only(tmp_path):
+    path = tmp_path / "cache" / "cookies.json"
+    data = {"saved_at": 1.5, "cookies": [{"name": "MoodleSession", "value": "abc"}]}
+
+    write_private_json(str(path), data)
+
+    assert json.loads(path.read_text(encoding="utf-8")) == data
+    if os.name == "posix":
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert not (tmp_path / "cache" / "cookies.json.tmp").exists()
+
+
+def test_write_private_json_replaces_existing_file(tmp_path):
+    path = tmp_path / "cookies.json"
+    path.write_text("stale", encoding="utf-8")
+    os.chmod(path, 0o644)
+
+    write_private_json(str(path), {"cookies": []})
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {"cookies": []}
+    if os.name == "posix":
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600